@@ -29,8 +29,11 @@ config = context.config
 config.set_main_option("sqlalchemy.url", dsn)
 
 # Interpret the config file for Python logging.
-# This line sets up loggers basically.
-if config.config_file_name is not None:
+# This line sets up loggers basically. Skipped when the app runs migrations
+# in-process (db.run_migrations), so its own logging stays in place.
+if config.config_file_name is not None and config.attributes.get(
+    "configure_logger", True
+):
     fileConfig(config.config_file_name)
 
 # No metadata since we're not using SQLAlchemy ORM
@@ -0,0 +1,92 @@
+"""Translated messages lookup indexes
+
+Revision ID: 37d9b5d70dea
+Revises: 81f4a98a9213
+Create Date: 2026-10-15 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+import logging
+
+from alembic import op
+
+# Configure logger
+logger = logging.getLogger("alembic.migration")
+
+# revision identifiers, used by Alembic.
+revision: str = "37d9b5d70dea"
+down_revision: Union[str, None] = "81f4a98a9213"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Run each DDL statement in its own transaction so CockroachDB can apply
+    # them as separate online schema changes. A failure part way through leaves
+    # the earlier changes applied without bumping alembic_version, so every
+    # statement must be safe to run again
+    with op.get_context().autocommit_block():
+        # Reply lookups fetch telegram_message_id by tweet_id; storing the looked-up
+        # columns in the index answers them without a second probe of the primary key.
+        # INCLUDE works on both PostgreSQL and CockroachDB (where it means STORING)
+        op.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_tm_tweet_id_covering
+            ON translated_messages (tweet_id)
+            INCLUDE (telegram_message_id, character_name)
+            """
+        )
+        # Composite index for reply chains; it also serves parent_tweet_id-only
+        # lookups, so the single-column index is redundant
+        op.create_index(
+            "idx_tm_parent_tweet",
+            "translated_messages",
+            ["parent_tweet_id", "tweet_id"],
+            unique=False,
+            if_not_exists=True,
+        )
+
+        op.drop_index(
+            "idx_translated_messages_tweet_id",
+            table_name="translated_messages",
+            if_exists=True,
+        )
+        op.drop_index(
+            "idx_translated_messages_parent_tweet_id",
+            table_name="translated_messages",
+            if_exists=True,
+        )
+        logger.info("Replaced single-column tweet indexes on translated_messages")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Run each DDL statement in its own transaction; like upgrade, every
+    # statement must be safe to run again after a partial failure
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_translated_messages_tweet_id",
+            "translated_messages",
+            ["tweet_id"],
+            unique=False,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "idx_translated_messages_parent_tweet_id",
+            "translated_messages",
+            ["parent_tweet_id"],
+            unique=False,
+            if_not_exists=True,
+        )
+
+        op.drop_index(
+            "idx_tm_parent_tweet", table_name="translated_messages", if_exists=True
+        )
+        op.drop_index(
+            "idx_tm_tweet_id_covering",
+            table_name="translated_messages",
+            if_exists=True,
+        )
+        logger.info("Restored single-column tweet indexes on translated_messages")
@@ -1,10 +1,136 @@
+import argparse
 import asyncio
+import contextlib
+import os
 import sys
-import datetime
 import logging
+import orjson
 import config
-from common import logger, direct_search_and_forward
-from db import get_connection_pool, close_connection_pool
+from cli_lite import _SORTED_CHARS, cmd_show_config, print_usage
+
+# Modules that pull in pydantic, httpx and asyncpg are imported by the commands
+# that need them, and common (logging setup and environment checks) only once a
+# command runs, so the top-level help prints without loading them. Log with the
+# logger common configures.
+logger = logging.getLogger("common")
+
+# Search query for tweets from all configured characters; characters are
+# loaded once with the config, so build it once as well
+_ALL_CHARACTERS_QUERY = " OR ".join(
+    f"from:{char.twitter_handle}"
+    for char in config.characters._character_config.values()
+)
+
+# Messages sent by the error logger test commands
+_TEST_ALERT_TEMPLATE = "🧪 TEST ALERT: {message}"
+_TEST_EXCEPTION_TEMPLATE = (
+    "🚨 *Test Error on {hostname}*\n\n```\n{message}: {error}\n\n{traceback}\n```"
+)
+
+# Option parsers, built once at import; each command prints its own usage text
+# Options shared by the commands that page through search results
+# (--limit is added per command: parents share argument objects, so
+# set_defaults on one command would change the default for all of them)
+_SEARCH_OPTIONS = argparse.ArgumentParser(add_help=False)
+_SEARCH_OPTIONS.add_argument(
+    "--type", dest="query_type", choices=["Latest", "Top"], default="Latest"
+)
+_SEARCH_OPTIONS.add_argument("--cursor", default="")
+
+_FETCH_AND_SEND_PARSER = argparse.ArgumentParser(
+    prog="fetch-and-send", add_help=False, parents=[_SEARCH_OPTIONS]
+)
+_FETCH_AND_SEND_PARSER.add_argument("--limit", type=int, default=5)
+_FETCH_AND_SEND_PARSER.add_argument("--character")
+_FETCH_AND_SEND_PARSER.add_argument(
+    "--no-forward", dest="forward", action="store_false"
+)
+
+_DUMP_TWEETS_PARSER = argparse.ArgumentParser(
+    prog="dump-tweets", add_help=False, parents=[_SEARCH_OPTIONS]
+)
+_DUMP_TWEETS_PARSER.add_argument("--limit", type=int, default=20)
+_DUMP_TWEETS_PARSER.add_argument("--file")
+_DUMP_TWEETS_PARSER.add_argument("--append", action="store_true")
+
+_SEND_FROM_FILE_PARSER = argparse.ArgumentParser(prog="send-from-file", add_help=False)
+_SEND_FROM_FILE_PARSER.add_argument("--file")
+_SEND_FROM_FILE_PARSER.add_argument("--character")
+# Kept for backward compatibility; translation is always on now
+_SEND_FROM_FILE_PARSER.add_argument("--translate")
+_SEND_FROM_FILE_PARSER.add_argument("--limit", type=int)
+_SEND_FROM_FILE_PARSER.add_argument("--offset", type=int, default=0)
+_SEND_FROM_FILE_PARSER.add_argument("--dry-run", action="store_true")
+
+
+# Blocking file helpers; the commands run them with asyncio.to_thread so large
+# files don't stall the event loop
+def _load_json(file_path):
+    """
+    Read and decode a JSON file.
+
+    Args:
+        file_path: Path of the file to read
+
+    Returns:
+        The decoded JSON value
+    """
+    with open(file_path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def _dump_json(data, file_path):
+    """
+    Write data to a JSON file (UTF-8, indented, without escaping).
+
+    Args:
+        data: JSON-serializable value to write
+        file_path: Path of the file to write
+    """
+    with open(file_path, "wb") as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+def _append_json_list(items, file_path):
+    """
+    Append items to a JSON list file without loading its existing entries.
+    The closing bracket is overwritten with the new entries, so only the new
+    items are held in memory.
+
+    Args:
+        items: JSON-serializable values to append
+        file_path: Path of an existing file holding a JSON list
+
+    Returns:
+        True if the items were appended, False if the file is not a JSON list
+    """
+    with open(file_path, "rb+") as f:
+        head = f.read(1024).lstrip()
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        tail_size = min(size, 4096)
+        f.seek(size - tail_size)
+        tail = f.read().rstrip()
+        if not head.startswith(b"[") or not tail.endswith(b"]"):
+            return False
+
+        if not items:
+            return True
+
+        # Position just after the last entry (or the opening bracket)
+        before_bracket = tail[:-1].rstrip()
+        if not before_bracket:
+            return False
+        end = size - tail_size + len(before_bracket)
+        # No entry of a JSON list ends with "[", so this means the list is empty
+        is_empty = before_bracket.endswith(b"[")
+        # Entries serialized as an indented list, without the brackets
+        body = orjson.dumps(items, option=orjson.OPT_INDENT_2)[1:-1]
+
+        f.seek(end)
+        f.truncate()
+        f.write((body if is_empty else b"," + body) + b"]")
+    return True
 
 
 async def cmd_fetch_and_send(args):
@@ -34,158 +160,163 @@ async def cmd_fetch_and_send(args):
         print("  fetch-and-send --limit=0  # Fetch all available tweets")
         print("  fetch-and-send --no-forward")
         print("\nAvailable characters:")
-        for name in sorted(config.characters._character_config.keys()):
-            char = config.characters._character_config[name]
-            print(f"  - {name.capitalize()} (@{char.twitter_handle})")
+        for label, handle in _SORTED_CHARS:
+            print(f"  - {label} (@{handle})")
         return
 
     # By default, search for tweets from all configured characters
-    query = " OR ".join(
-        f"from:{char.twitter_handle}"
-        for char in config.characters._character_config.values()
-    )
+    query = _ALL_CHARACTERS_QUERY
 
-    # Parse optional arguments
-    requested_limit = 5  # Default limit
+    # Parse optional arguments (unknown arguments are ignored)
+    options, _ = _FETCH_AND_SEND_PARSER.parse_known_args(args)
     max_page_size = 20  # Max tweets per page from API
-    query_type = "Latest"
-    forward = True
-    cursor = ""
-    character = None
+    query_type = options.query_type
+    forward = options.forward
+    cursor = options.cursor
+    character = options.character
     fetch_all = False
 
-    for arg in args:
-        if arg.startswith("--limit="):
-            try:
-                requested_limit = int(arg.split("=")[1])
-                if requested_limit < 0:
-                    print("Limit must be 0 or greater")
-                    return
-                if requested_limit == 0:
-                    fetch_all = True
-                    # Set an extremely high limit, though we'll stop when we run out of tweets
-                    requested_limit = 1000000000  # 1 billion, effectively unlimited
-            except:
-                print(f"Invalid limit value: {arg}")
-                return
-        elif arg.startswith("--type="):
-            query_type = arg.split("=")[1]
-            if query_type not in ["Latest", "Top"]:
-                print(f"Invalid query type: {query_type}. Must be 'Latest' or 'Top'")
-                return
-        elif arg.startswith("--cursor="):
-            cursor = arg.split("=")[1]
-        elif arg.startswith("--character="):
-            character = arg.split("=")[1]
-            # Verify character exists
-            try:
-                char_obj = getattr(config.characters, character)
-                print(f"Using character: {character} (@{char_obj.twitter_handle})")
-            except (AttributeError, KeyError):
-                print(f"Character '{character}' not found. Available characters:")
-                for char_name in config.characters._character_config.keys():
-                    print(f"  - {char_name}")
-                return
-        elif arg == "--no-forward":
-            forward = False
+    requested_limit = options.limit
+    if requested_limit < 0:
+        print("Limit must be 0 or greater")
+        return
+    if requested_limit == 0:
+        fetch_all = True
+        # Set an extremely high limit, though we'll stop when we run out of tweets
+        requested_limit = 1000000000  # 1 billion, effectively unlimited
+
+    if character:
+        # Verify character exists
+        try:
+            char_obj = getattr(config.characters, character)
+            print(f"Using character: {character} (@{char_obj.twitter_handle})")
+        except (AttributeError, KeyError):
+            print(f"Character '{character}' not found. Available characters:")
+            for char_name in config.characters._character_config.keys():
+                print(f"  - {char_name}")
+            return
+
+    from common import direct_search_and_forward
+    from tweet import search_tweets
 
     # Auto-pagination to meet requested limit
     total_processed = 0
-    all_results = []
-    remaining_limit = requested_limit
-    current_cursor = cursor
+    successful = 0
 
     if fetch_all:
         print("Fetching all available tweets...")
     else:
         print(f"Fetching up to {requested_limit} tweets...")
 
-    while remaining_limit > 0:
-        # Determine limit for this request (max 20 per page)
-        current_limit = min(remaining_limit, max_page_size)
-
-        # Run the search function for this page
-        results = await direct_search_and_forward(
-            query=query,
-            query_type=query_type,
-            limit=current_limit,
-            forward_to_telegram=forward,
-            cursor=current_cursor,
-            character_name=character,
-        )
+    # Pages waiting to be forwarded. The next page is fetched while the
+    # current one is being translated and forwarded.
+    pages: asyncio.Queue = asyncio.Queue(maxsize=4)
+
+    async def fetch_pages():
+        """Follow the cursor and queue (limit, search results) per page."""
+        remaining_limit = requested_limit
+        current_cursor = cursor
+        # IDs of tweets already queued; pagination can repeat tweets at page
+        # boundaries, and they shouldn't be forwarded twice
+        seen_ids = set()
+        try:
+            while remaining_limit > 0:
+                # Determine limit for this request (max 20 per page)
+                current_limit = min(remaining_limit, max_page_size)
+
+                search_results = await search_tweets(query, query_type, current_cursor)
+                tweets = search_results.get("tweets", [])
+                if not tweets:
+                    # No more tweets available
+                    break
+
+                # Keep up to current_limit tweets not seen on earlier pages
+                new_tweets = []
+                for tweet_data in tweets:
+                    if len(new_tweets) >= current_limit:
+                        break
+                    tweet_id = (
+                        tweet_data.get("id") if isinstance(tweet_data, dict) else None
+                    )
+                    if tweet_id is not None:
+                        if tweet_id in seen_ids:
+                            continue
+                        seen_ids.add(tweet_id)
+                    new_tweets.append(tweet_data)
+
+                if new_tweets:
+                    await pages.put(
+                        (current_limit, {**search_results, "tweets": new_tweets})
+                    )
 
-        # Check for errors
-        if results.get("status") != "success":
-            print(f"Error: {results.get('message', 'Unknown error')}")
-            return
+                # Update remaining limit
+                remaining_limit -= len(new_tweets)
 
-        # Process results
-        count = results.get("count", 0)
-        if count == 0:
-            # No more tweets available
-            break
+                # Check if there are more pages available and update cursor
+                next_cursor = search_results.get("next_cursor", "")
+                has_next_page = search_results.get("has_next_page", False)
 
-        # Track processed tweets
-        all_results.extend(results.get("results", []))
-        total_processed += count
+                if not has_next_page or not next_cursor:
+                    logger.info("No more pages available.")
+                    break
 
-        # Update remaining limit
-        remaining_limit -= count
+                # Update cursor for next page
+                logger.info(f"Next cursor: {next_cursor}")
+                current_cursor = next_cursor
+        except Exception as e:
+            await pages.put(e)
 
-        # Check if there are more pages available and update cursor
-        next_cursor = results.get("next_cursor", "")
-        has_next_page = results.get("has_next_page", False)
+        # Mark the end of the pages. Not reached when cancelled: the consumer
+        # has stopped reading, and waiting on a full queue would block again
+        await pages.put(None)
 
-        if not has_next_page or not next_cursor:
-            logger.info("No more pages available.")
-            break
+    fetcher = asyncio.create_task(fetch_pages())
+    try:
+        while True:
+            page = await pages.get()
+            if page is None:
+                break
+            if isinstance(page, Exception):
+                print(f"Error: {str(page)}")
+                return
 
-        # Update cursor for next page
-        logger.info(f"Next cursor: {next_cursor}")
-        current_cursor = next_cursor
-        print(f"Fetched {count} tweets, continuing to next page...")
+            current_limit, search_results = page
 
-    # Sort tweets by date before forwarding (if needed)
-    if forward and all_results:
-        print("Sorting tweets by date before sending to Telegram...")
-        try:
-            # Create a list of (result, date) tuples for sorting
-            dated_results = []
+            # Forward this page's tweets
+            results = await direct_search_and_forward(
+                query=query,
+                query_type=query_type,
+                limit=current_limit,
+                forward_to_telegram=forward,
+                character_name=character,
+                search_results=search_results,
+            )
 
-            for result in all_results:
-                # Skip results without tweet_id or not a dict
-                if not isinstance(result, dict) or "tweet_id" not in result:
-                    dated_results.append((result, None))  # Will go to the end
-                    continue
+            # Check for errors
+            if results.get("status") != "success":
+                print(f"Error: {results.get('message', 'Unknown error')}")
+                return
+
+            # Process results
+            count = results.get("count", 0)
 
-                # Extract the tweet ID and try to determine its date
-                tweet_id = result.get("tweet_id")
-                tweet_date = None
-
-                # We don't have direct access to the tweet data from here
-                # Use timestamp or other information if available in the result
-                # For now, we'll rely on the order we received the tweets
-                # Twitter API typically returns tweets in reverse chronological order
-                # So we'll use the index as a proxy for time
-                index_in_results = all_results.index(result)
-                dated_results.append((result, index_in_results))
-
-            # Sort by index (proxy for time), with None values at the end
-            # Reverse the sort to get oldest first (smallest index = oldest)
-            sorted_results = [
-                r[0]
-                for r in sorted(
-                    dated_results,
-                    key=lambda x: (x[1] is None, -x[1] if x[1] is not None else None),
+            # Track processed tweets, counting successful forwards as we go
+            total_processed += count
+            if forward:
+                successful += sum(
+                    1
+                    for r in results.get("results", [])
+                    if isinstance(r, dict) and r.get("forwarded") is True
                 )
-            ]
 
-            # Replace all_results with the sorted version
-            all_results = sorted_results
-            print(f"Sorted {len(sorted_results)} tweets for chronological sending")
-        except Exception as e:
-            print(f"Warning: Failed to sort tweets: {str(e)}")
-            print("Will process tweets in their original order")
+            if results.get("has_next_page") and results.get("next_cursor"):
+                print(f"Fetched {count} tweets, continuing to next page...")
+    finally:
+        # Stop fetching if forwarding ended early, and wait for the fetcher
+        # to finish so it makes no more search requests
+        fetcher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await fetcher
 
     # Print summary
     print(f"\nSearch for: {query}")
@@ -195,11 +326,7 @@ async def cmd_fetch_and_send(args):
     if fetch_all:
         print("All available tweets have been processed.")
 
-    # Count successful forwards
     if forward:
-        successful = sum(
-            1 for r in all_results if isinstance(r, dict) and r.get("forwarded") is True
-        )
         print(f"Successfully forwarded {successful} tweets to Telegram")
     else:
         print("Tweets found but not forwarded (--no-forward specified)")
@@ -212,7 +339,6 @@ async def cmd_dump_tweets(args):
     Args:
         args: Command-line arguments after the subcommand
     """
-    import json
     import os
     from datetime import datetime
     from tweet import search_tweets
@@ -242,62 +368,30 @@ async def cmd_dump_tweets(args):
         return
 
     # By default, search for tweets from all configured characters
-    query = " OR ".join(
-        f"from:{char.twitter_handle}"
-        for char in config.characters._character_config.values()
-    )
+    query = _ALL_CHARACTERS_QUERY
 
-    # Parse optional arguments
-    requested_limit = 20  # Default limit
+    # Parse optional arguments (unknown arguments are ignored)
+    options, _ = _DUMP_TWEETS_PARSER.parse_known_args(args)
     max_page_size = 20  # Max tweets per page from API
-    query_type = "Latest"
-    starting_cursor = ""
-    append_mode = False
+    query_type = options.query_type
+    starting_cursor = options.cursor
+    append_mode = options.append
     fetch_all = False
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    file_path = f"tweets_{timestamp}.json"
+    file_path = options.file or f"tweets_{timestamp}.json"
 
-    for arg in args:
-        if arg.startswith("--limit="):
-            try:
-                requested_limit = int(arg.split("=")[1])
-                if requested_limit < 0:
-                    print("Limit must be 0 or greater")
-                    return
-                if requested_limit == 0:
-                    fetch_all = True
-                    # Set an extremely high limit, though we'll stop when we run out of tweets
-                    requested_limit = 1000000000  # 1 billion, effectively unlimited
-            except:
-                print(f"Invalid limit value: {arg}")
-                return
-        elif arg.startswith("--type="):
-            query_type = arg.split("=")[1]
-            if query_type not in ["Latest", "Top"]:
-                print(f"Invalid query type: {query_type}. Must be 'Latest' or 'Top'")
-                return
-        elif arg.startswith("--cursor="):
-            starting_cursor = arg.split("=")[1]
-        elif arg.startswith("--file="):
-            file_path = arg.split("=", 1)[1]
-        elif arg == "--append":
-            append_mode = True
-
-    # Check if we should append to existing file
-    existing_tweets = []
-    if append_mode and os.path.exists(file_path):
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                existing_tweets = json.load(f)
-            if not isinstance(existing_tweets, list):
-                existing_tweets = []
-                print(
-                    f"Warning: Existing file {file_path} does not contain a JSON list. Creating a new list."
-                )
-        except json.JSONDecodeError:
-            print(
-                f"Warning: Existing file {file_path} is not valid JSON. Creating a new list."
-            )
+    requested_limit = options.limit
+    if requested_limit < 0:
+        print("Limit must be 0 or greater")
+        return
+    if requested_limit == 0:
+        fetch_all = True
+        # Set an extremely high limit, though we'll stop when we run out of tweets
+        requested_limit = 1000000000  # 1 billion, effectively unlimited
+
+    # Check if we should append to existing file; its tweets are not loaded,
+    # the new ones are written after them
+    append_to_existing = append_mode and os.path.exists(file_path)
 
     if fetch_all:
         print("Fetching all available tweets...")
@@ -355,17 +449,21 @@ async def cmd_dump_tweets(args):
             if remaining_limit <= 0:
                 break
 
-        # Combine with existing tweets if in append mode
-        final_tweets = existing_tweets + all_tweets
-
-        # Save all tweets to file
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(final_tweets, f, indent=2, ensure_ascii=False)
+        # Save tweets to file, after the existing ones if in append mode
+        appended = False
+        if append_to_existing:
+            appended = await asyncio.to_thread(_append_json_list, all_tweets, file_path)
+            if not appended:
+                print(
+                    f"Warning: Existing file {file_path} does not contain a JSON list. Creating a new list."
+                )
+        if not appended:
+            await asyncio.to_thread(_dump_json, all_tweets, file_path)
 
         print(f"\nSuccessfully saved {total_fetched} new tweets to {file_path}")
 
-        if len(existing_tweets) > 0:
-            print(f"File now contains {len(final_tweets)} tweets total.")
+        if appended:
+            print("New tweets were appended after the existing tweets in the file.")
 
         # Show message about fetching all tweets or limits
         if fetch_all:
@@ -453,7 +551,6 @@ async def cmd_send_from_file(args):
     Args:
         args: Command-line arguments after the subcommand
     """
-    import json
     import os
     from tweet import Tweet, format_tweet_for_telegram
     from telegram import send_telegram_message
@@ -461,7 +558,7 @@ async def cmd_send_from_file(args):
 
     # Import translation module - always needed now
     try:
-        from translate import translate, TranslationError
+        from translate import translate_batch, TranslationError
     except ImportError:
         print(
             "Error: Translation module not available. Make sure the translate.py file exists."
@@ -488,48 +585,29 @@ async def cmd_send_from_file(args):
             "  send-from-file --file=tweets.json --limit=5 --dry-run # Test with 5 tweets"
         )
         print("\nAvailable characters:")
-        for name in sorted(config.characters._character_config.keys()):
-            char = config.characters._character_config[name]
-            print(f"  - {name.capitalize()} (@{char.twitter_handle})")
+        for label, handle in _SORTED_CHARS:
+            print(f"  - {label} (@{handle})")
         return
 
-    # Parse required arguments
-    file_path = None
-    character = None
-    limit = None
-    offset = 0
-    dry_run = False
+    # Parse required arguments (unknown arguments are ignored)
+    options, _ = _SEND_FROM_FILE_PARSER.parse_known_args(args)
+    file_path = options.file
+    character = options.character
+    limit = options.limit
+    offset = options.offset
+    dry_run = options.dry_run
 
-    for arg in args:
-        if arg.startswith("--file="):
-            file_path = arg.split("=", 1)[1]
-        elif arg.startswith("--character="):
-            character = arg.split("=")[1]
-        elif arg.startswith("--translate="):
-            # Keep for backward compatibility but display a notification
-            print(
-                "Note: Translation is now automatic for all tweets. The --translate flag is no longer needed."
-            )
-        elif arg.startswith("--limit="):
-            try:
-                limit = int(arg.split("=")[1])
-                if limit <= 0:
-                    print("Limit must be greater than 0")
-                    return
-            except:
-                print(f"Invalid limit value: {arg}")
-                return
-        elif arg.startswith("--offset="):
-            try:
-                offset = int(arg.split("=")[1])
-                if offset < 0:
-                    print("Offset must be 0 or greater")
-                    return
-            except:
-                print(f"Invalid offset value: {arg}")
-                return
-        elif arg == "--dry-run":
-            dry_run = True
+    if options.translate is not None:
+        # Keep for backward compatibility but display a notification
+        print(
+            "Note: Translation is now automatic for all tweets. The --translate flag is no longer needed."
+        )
+    if limit is not None and limit <= 0:
+        print("Limit must be greater than 0")
+        return
+    if offset < 0:
+        print("Offset must be 0 or greater")
+        return
 
     # Validate required parameters
     if not file_path:
@@ -561,12 +639,11 @@ async def cmd_send_from_file(args):
 
     try:
         # Read the JSON file
-        with open(file_path, "r", encoding="utf-8") as f:
-            try:
-                tweets_data = json.load(f)
-            except json.JSONDecodeError:
-                print(f"Error: '{file_path}' is not a valid JSON file")
-                return
+        try:
+            tweets_data = await asyncio.to_thread(_load_json, file_path)
+        except orjson.JSONDecodeError:
+            print(f"Error: '{file_path}' is not a valid JSON file")
+            return
 
         # Verify tweets_data is a list
         if not isinstance(tweets_data, list):
@@ -591,51 +668,54 @@ async def cmd_send_from_file(args):
 
         print(f"File contains {total_tweets} tweets")
         print(
-            f"Processing tweets {start_idx+1} to {end_idx} ({count_to_process} tweets)"
+            f"Processing tweets {start_idx + 1} to {end_idx} ({count_to_process} tweets)"
         )
 
+        # Parse each tweet once; the model's parsed_date is used for sorting
+        # and the model itself for sending. Parse errors are kept and reported
+        # when the tweet is processed.
+        parsed_tweets = []
+        for tweet_data in tweets_to_process:
+            try:
+                parsed_tweets.append((tweet_data, Tweet.parse_obj(tweet_data)))
+            except Exception as e:
+                parsed_tweets.append((tweet_data, e))
+
         # Sort tweets by date before processing
         print("Sorting tweets by date (oldest to newest)...")
         try:
-            # Try to parse dates from tweets and sort
-            dated_tweets = []
-            for tweet_data in tweets_to_process:
-                # First try to use parsed_date if it exists
-                if "parsed_date" in tweet_data:
-                    dated_tweets.append((tweet_data, tweet_data["parsed_date"]))
-                    continue
 
-                # Otherwise, try to parse from createdAt
-                if "createdAt" in tweet_data:
-                    try:
-                        date_obj = datetime.datetime.strptime(
-                            tweet_data["createdAt"], "%a %b %d %H:%M:%S %z %Y"
-                        )
-                        dated_tweets.append((tweet_data, date_obj))
-                    except (ValueError, TypeError):
-                        # If parsing fails, add with None date (will be at the end)
-                        dated_tweets.append((tweet_data, None))
-                else:
-                    # No date field found
-                    dated_tweets.append((tweet_data, None))
-
-            # Sort by date, handling None dates
-            tweets_to_process = [
-                t[0]
-                for t in sorted(
-                    dated_tweets,
-                    key=lambda x: (x[1] is None, x[1]),  # None values go to the end
-                )
-            ]
+            def date_key(entry):
+                date_obj = entry[1].parsed_date if isinstance(entry[1], Tweet) else None
+                # None values go to the end
+                return (date_obj is None, date_obj or 0)
 
-            print(f"Sorted {len(tweets_to_process)} tweets by date")
+            parsed_tweets.sort(key=date_key)
+            print(f"Sorted {len(parsed_tweets)} tweets by date")
         except Exception as e:
             print(f"Warning: Failed to sort tweets by date: {str(e)}")
             print("Will process tweets in their original order")
 
+        tweets_to_process = [entry[0] for entry in parsed_tweets]
+
         if dry_run:
             print("DRY RUN MODE: Tweets will not actually be sent to Telegram")
 
+        # Translate all tweets up front, several at a time. Sending below stays
+        # sequential so the messages keep their chronological order.
+        print(f"Translating {count_to_process} tweets to Korean...")
+        translations = await translate_batch(
+            [
+                (
+                    (tweet_data.get("text") or "(No text)")
+                    if isinstance(tweet_data, dict)
+                    else ""
+                )
+                for tweet_data in tweets_to_process
+            ],
+            return_exceptions=True,
+        )
+
         # Process each tweet
         successful = 0
         failed = 0
@@ -643,8 +723,10 @@ async def cmd_send_from_file(args):
         for i, tweet_data in enumerate(tweets_to_process):
             current_idx = start_idx + i + 1
             try:
-                # Parse the tweet
-                tweet = Tweet.parse_obj(tweet_data)
+                # Use the tweet parsed before sorting
+                tweet = parsed_tweets[i][1]
+                if isinstance(tweet, Exception):
+                    raise tweet
 
                 # Get tweet info for logging
                 tweet_id = tweet.id or f"unknown-{i}"
@@ -676,14 +758,16 @@ async def cmd_send_from_file(args):
                 translated_text = None
 
                 if original_text:
-                    try:
-                        print("  Translating to Korean...")
-                        translated_text = await translate(original_text)
+                    translation = translations[i]
+                    if isinstance(translation, TranslationError):
+                        print(f"  ⚠️ Translation error: {str(translation)}")
+                    elif isinstance(translation, Exception):
+                        print(
+                            f"  ⚠️ Unexpected error during translation: {str(translation)}"
+                        )
+                    elif translation:
+                        translated_text = translation
                         print("  Translation successful")
-                    except TranslationError as e:
-                        print(f"  ⚠️ Translation error: {str(e)}")
-                    except Exception as e:
-                        print(f"  ⚠️ Unexpected error during translation: {str(e)}")
 
                 # In dry run mode, just print the tweet details
                 if dry_run:
@@ -750,11 +834,10 @@ async def cmd_send_from_file(args):
 
                 # Format and send the tweet
                 if translated_text:
-                    # Create a copy of the tweet with translated text
-                    tweet_dict = tweet.dict()
-                    tweet_dict["text"] = translated_text
-                    translated_tweet = Tweet.parse_obj(tweet_dict)
-                    formatted_message = format_tweet_for_telegram(translated_tweet)
+                    # Show the translated text without copying the tweet
+                    formatted_message = format_tweet_for_telegram(
+                        tweet, override_text=translated_text
+                    )
                 else:
                     formatted_message = format_tweet_for_telegram(tweet)
 
@@ -833,97 +916,11 @@ async def cmd_send_from_file(args):
         print(f"Error: {str(e)}")
 
 
-async def cmd_show_config(args):
-    """
-    Display the current configuration settings.
-
-    Args:
-        args: Command-line arguments after the subcommand
-    """
-    import config
-    from translate import ANTHROPIC_AVAILABLE, OPENAI_AVAILABLE
-
-    # Check if help is requested
-    if args and args[0] in ["-h", "--help"]:
-        print("Usage: show-config")
-        print("\nDescription:")
-        print(
-            "  Display the current configuration settings, including API endpoints and model details."
-        )
-        print(
-            "  This can be helpful for debugging or confirming your environment is set up correctly."
-        )
-        return
-
-    print("Current Configuration Settings:")
-    print("==============================")
-
-    # Translation settings
-    print("\nTranslation:")
-    print("  Configured LLM Providers (in order of preference):")
-    for i, model in enumerate(config.common.TRANSLATION_MODELS):
-        print(f"    {i+1}. {model}")
-
-    # Legacy translation model setting
-    print("\n  Legacy Setting (backward compatibility):")
-    print(f"  TRANSLATION_MODEL: {config.common.TRANSLATION_MODEL}")
-    print(f"  DEFAULT_TRANSLATION_MODEL: {config.common.DEFAULT_TRANSLATION_MODEL}")
-    print(
-        f"  Using custom model: {'Yes' if config.common.TRANSLATION_MODEL != config.common.DEFAULT_TRANSLATION_MODEL else 'No'}"
-    )
-
-    # API endpoints
-    print("\nAPI Endpoints:")
-    print(f"  Twitter API base URL: {config.common.TWITTER_API_BASE_URL}")
-    print(f"  Twitter search endpoint: {config.common.TWITTER_SEARCH_ENDPOINT}")
-
-    # Check environment variables (without showing full values)
-    print("\nAPI Keys (Status):")
-    print(
-        f"  ANTHROPIC_API_KEY: {'Configured' if config.common.ANTHROPIC_API_KEY else 'Not set'}"
-    )
-    print(
-        f"  OPENAI_API_KEY: {'Configured' if config.common.OPENAI_API_KEY else 'Not set'}"
-    )
-    print(
-        f"  TWITTER_API_KEY: {'Configured' if config.common.TWITTER_API_KEY else 'Not set'}"
-    )
-
-    # Telegram settings
-    print("\nTelegram:")
-    print(
-        f"  Primary chat ID: {'Configured' if config.common.TELEGRAM_CHAT_ID else 'Not set'}"
-    )
-
-    # Characters
-    print("\nConfigured Characters:")
-    for name in sorted(config.characters._character_config.keys()):
-        char = config.characters._character_config[name]
-        print(f"  - {name.capitalize()} (@{char.twitter_handle})")
-
-    # LLM Provider availability
-    print("\nLLM Provider Support:")
-    print(
-        f"  Anthropic: {'Available' if ANTHROPIC_AVAILABLE else 'Not available - Install with pip install anthropic'}"
-    )
-    print(
-        f"  OpenAI: {'Available' if OPENAI_AVAILABLE else 'Not available - Install with pip install openai'}"
-    )
-
-    print(
-        "\nNote: To configure multiple LLM providers, set the TRANSLATION_MODELS environment variable."
-    )
-    print("Format: 'provider1:model1,provider2:model2,...'")
-    print("Example: 'anthropic:claude-3-7-sonnet-20250219,openai:gpt-4o'")
-    print("Translation will try each provider from left to right until successful.")
-
-
 async def cmd_test_error_logger(args):
     """
     Test the error logger by sending a test message to Telegram.
     """
-    import config
-    from logging_handlers import TelegramLogHandler
+    from common import TELEGRAM_ERROR_HANDLER
 
     # Check if help is requested
     if args and args[0] in ["-h", "--help"]:
@@ -938,10 +935,7 @@ async def cmd_test_error_logger(args):
         return
 
     # Check if error logger is configured
-    if (
-        not config.common.TELEGRAM_ERROR_BOT_TOKEN
-        or not config.common.TELEGRAM_ERROR_CHAT_ID
-    ):
+    if TELEGRAM_ERROR_HANDLER is None:
         print("Error: Telegram error logger is not configured")
         print(
             "Please set TELEGRAM_ERROR_BOT_TOKEN and TELEGRAM_ERROR_CHAT_ID environment variables"
@@ -953,18 +947,8 @@ async def cmd_test_error_logger(args):
 
     print(f"Sending test error message to Telegram: '{message}'")
 
-    # Create the handler directly
-    handler = TelegramLogHandler(
-        config.common.TELEGRAM_ERROR_BOT_TOKEN,
-        config.common.TELEGRAM_ERROR_CHAT_ID,
-        level=logging.ERROR,
-    )
-
-    # Format a message for Telegram directly
-    formatted_message = f"🧪 TEST ALERT: {message}"
-
-    # Send directly using the handler's async method
-    await handler._async_send(formatted_message)
+    # Send directly through the configured handler
+    await TELEGRAM_ERROR_HANDLER.send(_TEST_ALERT_TEMPLATE.format(message=message))
 
     print("Test error message sent to Telegram")
     print(
@@ -977,9 +961,7 @@ async def cmd_test_exception(args):
     """
     Test the error logger by raising an exception that should be logged.
     """
-    import config
-    from logging_handlers import TelegramLogHandler
-    import socket
+    from common import TELEGRAM_ERROR_HANDLER
     import traceback
 
     # Check if help is requested
@@ -995,10 +977,7 @@ async def cmd_test_exception(args):
         return
 
     # Check if error logger is configured
-    if (
-        not config.common.TELEGRAM_ERROR_BOT_TOKEN
-        or not config.common.TELEGRAM_ERROR_CHAT_ID
-    ):
+    if TELEGRAM_ERROR_HANDLER is None:
         print("Error: Telegram error logger is not configured")
         print(
             "Please set TELEGRAM_ERROR_BOT_TOKEN and TELEGRAM_ERROR_CHAT_ID environment variables"
@@ -1011,13 +990,6 @@ async def cmd_test_exception(args):
     print(f"Raising a test exception: '{message}'")
     print("This exception should be logged and sent to Telegram.")
 
-    # Create the handler directly
-    handler = TelegramLogHandler(
-        config.common.TELEGRAM_ERROR_BOT_TOKEN,
-        config.common.TELEGRAM_ERROR_CHAT_ID,
-        level=logging.ERROR,
-    )
-
     # Now raise an exception that should be caught and logged
     try:
         # Simulate a division by zero error
@@ -1030,13 +1002,16 @@ async def cmd_test_exception(args):
         logger.error(f"{message}: {str(e)}", exc_info=True)
 
         # Format a message for Telegram directly
-        hostname = socket.gethostname()
-        telegram_message = f"🚨 *Test Error on {hostname}*\n\n"
-        telegram_message += f"```\n{message}: {str(e)}\n\n{exc_traceback}\n```"
+        telegram_message = _TEST_EXCEPTION_TEMPLATE.format(
+            hostname=TELEGRAM_ERROR_HANDLER.hostname,
+            message=message,
+            error=str(e),
+            traceback=exc_traceback,
+        )
 
-        # Send directly using the handler's async method
+        # Send directly through the configured handler
         print("Sending error directly to Telegram...")
-        await handler._async_send(telegram_message)
+        await TELEGRAM_ERROR_HANDLER.send(telegram_message)
 
         print("Exception raised and test message sent. Check your Telegram.")
 
@@ -1123,7 +1098,7 @@ async def cmd_test_llm_providers(args):
         print("  test-llm-providers --all --api")
         print("\nCurrently configured models:")
         for i, model in enumerate(config.common.TRANSLATION_MODELS):
-            print(f"  {i+1}. {model}")
+            print(f"  {i + 1}. {model}")
         return
 
     # Parse arguments
@@ -1174,10 +1149,7 @@ async def cmd_test_llm_providers(args):
         # Build query
         if not api_query:
             # Default: search for tweets from all configured characters
-            api_query = " OR ".join(
-                f"from:{char.twitter_handle}"
-                for char in config.characters._character_config.values()
-            )
+            api_query = _ALL_CHARACTERS_QUERY
 
         print(f"Using query: {api_query}")
 
@@ -1219,7 +1191,7 @@ async def cmd_test_llm_providers(args):
                             }
                         )
                 except Exception as e:
-                    print(f"Error parsing tweet {i+1}: {str(e)}")
+                    print(f"Error parsing tweet {i + 1}: {str(e)}")
         except Exception as e:
             print(f"Error fetching tweets: {str(e)}")
             return
@@ -1263,13 +1235,15 @@ async def cmd_test_llm_providers(args):
         source = text_info["source"]
         text_id = text_info["id"]
 
-        print(f"\n[{text_idx+1}/{len(texts_to_translate)}] Testing text from {source}")
+        print(
+            f"\n[{text_idx + 1}/{len(texts_to_translate)}] Testing text from {source}"
+        )
         print(f"Input text ({len(text)} chars): '{text}'")
 
         text_results = []
 
         for i, model in enumerate(models_to_test):
-            print(f"\n  {i+1}. Testing {model}:")
+            print(f"\n  {i + 1}. Testing {model}:")
 
             # Parse provider and model name
             if ":" not in model:
@@ -1345,7 +1319,7 @@ async def cmd_test_llm_providers(args):
     )
 
     print(
-        f"\nOverall success rate: {successful_tests}/{total_tests} ({successful_tests/total_tests*100:.1f}%)"
+        f"\nOverall success rate: {successful_tests}/{total_tests} ({successful_tests / total_tests * 100:.1f}%)"
     )
 
     # Print per-model statistics
@@ -1405,6 +1379,8 @@ async def cmd_test_db(args):
     Test the PostgreSQL database connection and operations.
     """
     from db import (
+        get_connection_pool,
+        close_connection_pool,
         store_translated_message,
         get_telegram_message_id_for_tweet,
         run_migrations,
@@ -1512,67 +1488,38 @@ async def cmd_migrate_db(args):
         sys.exit(1)
 
 
-async def main_cli():
-    """Command-line interface for the Twitter to Telegram tool."""
-    # Initialize database connection at the start
-    try:
-        # Only initialize the pool for commands that might need it
-        db_dependent_commands = [
-            "fetch-and-send",
-            "send-from-file",
-            "test-db",
-            # Add other commands that need database access
-        ]
-
-        if len(sys.argv) > 1 and sys.argv[1] in db_dependent_commands:
-            # Don't await here - we'll let each command manage its own connection as needed
-            # This avoids initializing when not needed
-            pass
-    except Exception as e:
-        logger.warning(f"Failed to initialize database connection: {str(e)}")
-        logger.warning("Some database-dependent features may not work")
-
-    # List of available commands
-    commands = {
-        "fetch-and-send": cmd_fetch_and_send,
-        "dump-tweets": cmd_dump_tweets,
-        "send-from-file": cmd_send_from_file,
-        "send-admin-notification": cmd_send_admin_notification,
-        "test-error-logger": cmd_test_error_logger,
-        "test-exception": cmd_test_exception,
-        "show-config": cmd_show_config,
-        "test-translation-retry": cmd_test_translation_retry,
-        "test-llm-providers": cmd_test_llm_providers,
-        "test-db": cmd_test_db,
-        "migrate-db": cmd_migrate_db,
-        # Add more commands here as needed
+# Commands that may open the database connection pool
+_DB_DEPENDENT_COMMANDS = frozenset(
+    {
+        "fetch-and-send",
+        "send-from-file",
+        "test-db",
+        # Add other commands that need database access
     }
+)
+
+# Available commands; each command imports the modules it needs when it runs
+_COMMANDS = {
+    "fetch-and-send": cmd_fetch_and_send,
+    "dump-tweets": cmd_dump_tweets,
+    "send-from-file": cmd_send_from_file,
+    "send-admin-notification": cmd_send_admin_notification,
+    "test-error-logger": cmd_test_error_logger,
+    "test-exception": cmd_test_exception,
+    "show-config": cmd_show_config,
+    "test-translation-retry": cmd_test_translation_retry,
+    "test-llm-providers": cmd_test_llm_providers,
+    "test-db": cmd_test_db,
+    "migrate-db": cmd_migrate_db,
+    # Add more commands here as needed
+}
+
 
+async def main_cli():
+    """Command-line interface for the Twitter to Telegram tool."""
     # No arguments or help flag
     if len(sys.argv) < 2 or sys.argv[1] in ["-h", "--help"]:
-        print("Twitter to Telegram CLI")
-        print("\nUsage: python cli.py <command> [options]")
-        print("\nAvailable commands:")
-        print("  fetch-and-send          Fetch tweets and forward them to Telegram")
-        print("  dump-tweets             Fetch tweets and save them to a JSON file")
-        print("  send-from-file          Send tweets from a JSON file to Telegram")
-        print("  send-admin-notification Send an admin notification to Telegram as Mai")
-        print(
-            "  test-error-logger       Test the error logging system by sending a test message"
-        )
-        print(
-            "  test-exception          Test the error logger with a simulated exception"
-        )
-        print("  test-translation-retry  Test the translation retry mechanism")
-        print("  test-llm-providers      Test different LLM providers for translation")
-        print("  show-config             Display current configuration settings")
-        print(
-            "  test-db                 Test PostgreSQL database connection and operations"
-        )
-        print("  migrate-db              Run database migrations to update schema")
-        # Add more command descriptions here
-        print("\nFor help on a specific command, run:")
-        print("  python cli.py <command> --help")
+        print_usage()
         return
 
     # Get the command
@@ -1581,22 +1528,53 @@ async def main_cli():
     # Remove the command from arguments
     command_args = sys.argv[2:]
 
+    command_func = _COMMANDS.get(command)
+    if command_func is None:
+        print(f"Unknown command: {command}")
+        print("Available commands: " + ", ".join(_COMMANDS))
+        return
+
+    # Read-only commands don't need logging setup or the network modules
+    if command_func is cmd_show_config:
+        await cmd_show_config(command_args)
+        return
+
+    # Set up logging and check the environment before running a command
+    import common  # noqa: F401
+
     try:
-        if command in commands:
-            # Execute the command
-            await commands[command](command_args)
-        else:
-            print(f"Unknown command: {command}")
-            print("Available commands: " + ", ".join(commands.keys()))
+        # Execute the command
+        await command_func(command_args)
     finally:
         # Always close database connection when command is done
-        if command in db_dependent_commands:
+        if command in _DB_DEPENDENT_COMMANDS:
             try:
+                from db import close_connection_pool
+
                 await close_connection_pool()
             except Exception as e:
                 logger.debug(f"Error closing database connection: {str(e)}")
                 # Don't raise - we're in cleanup
 
+        # Close the shared HTTP client if the command used it
+        try:
+            from http_client import close_http_client
+
+            await close_http_client()
+        except Exception as e:
+            logger.debug(f"Error closing HTTP client: {str(e)}")
+
+        # Close the error logger's client if an error was sent
+        try:
+            from logging_handlers import close_log_client
+
+            await close_log_client()
+        except Exception as e:
+            logger.debug(f"Error closing log client: {str(e)}")
+
 
 if __name__ == "__main__":
-    asyncio.run(main_cli())
+    import uvloop
+
+    # Run on uvloop, as the server does
+    uvloop.run(main_cli())
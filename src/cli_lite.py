@@ -0,0 +1,127 @@
+"""
+Commands that only read the configuration.
+
+They are kept apart from cli.py so that they run without importing common,
+which sets up the Telegram error logger and checks the environment, or any
+of the modules that talk to the network.
+"""
+
+import importlib.util
+import config
+
+# Check that the provider SDKs are installed without importing them (or the
+# translate module, which imports the HTTP client)
+_ANTHROPIC_AVAILABLE = importlib.util.find_spec("anthropic") is not None
+_OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+
+# (Display name, Twitter handle) of each character, sorted by name for listings
+_SORTED_CHARS = tuple(
+    (name.capitalize(), char.twitter_handle)
+    for name, char in sorted(config.characters._character_config.items())
+)
+
+
+def print_usage():
+    """Print the list of available CLI commands."""
+    print("Twitter to Telegram CLI")
+    print("\nUsage: python cli.py <command> [options]")
+    print("\nAvailable commands:")
+    print("  fetch-and-send          Fetch tweets and forward them to Telegram")
+    print("  dump-tweets             Fetch tweets and save them to a JSON file")
+    print("  send-from-file          Send tweets from a JSON file to Telegram")
+    print("  send-admin-notification Send an admin notification to Telegram as Mai")
+    print(
+        "  test-error-logger       Test the error logging system by sending a test message"
+    )
+    print("  test-exception          Test the error logger with a simulated exception")
+    print("  test-translation-retry  Test the translation retry mechanism")
+    print("  test-llm-providers      Test different LLM providers for translation")
+    print("  show-config             Display current configuration settings")
+    print(
+        "  test-db                 Test PostgreSQL database connection and operations"
+    )
+    print("  migrate-db              Run database migrations to update schema")
+    # Add more command descriptions here
+    print("\nFor help on a specific command, run:")
+    print("  python cli.py <command> --help")
+
+
+async def cmd_show_config(args):
+    """
+    Display the current configuration settings.
+
+    Args:
+        args: Command-line arguments after the subcommand
+    """
+    # Check if help is requested
+    if args and args[0] in ["-h", "--help"]:
+        print("Usage: show-config")
+        print("\nDescription:")
+        print(
+            "  Display the current configuration settings, including API endpoints and model details."
+        )
+        print(
+            "  This can be helpful for debugging or confirming your environment is set up correctly."
+        )
+        return
+
+    print("Current Configuration Settings:")
+    print("==============================")
+
+    # Translation settings
+    print("\nTranslation:")
+    print("  Configured LLM Providers (in order of preference):")
+    for i, model in enumerate(config.common.TRANSLATION_MODELS):
+        print(f"    {i + 1}. {model}")
+
+    # Legacy translation model setting
+    print("\n  Legacy Setting (backward compatibility):")
+    print(f"  TRANSLATION_MODEL: {config.common.TRANSLATION_MODEL}")
+    print(f"  DEFAULT_TRANSLATION_MODEL: {config.common.DEFAULT_TRANSLATION_MODEL}")
+    print(
+        f"  Using custom model: {'Yes' if config.common.TRANSLATION_MODEL != config.common.DEFAULT_TRANSLATION_MODEL else 'No'}"
+    )
+
+    # API endpoints
+    print("\nAPI Endpoints:")
+    print(f"  Twitter API base URL: {config.common.TWITTER_API_BASE_URL}")
+    print(f"  Twitter search endpoint: {config.common.TWITTER_SEARCH_ENDPOINT}")
+
+    # Check environment variables (without showing full values)
+    print("\nAPI Keys (Status):")
+    print(
+        f"  ANTHROPIC_API_KEY: {'Configured' if config.common.ANTHROPIC_API_KEY else 'Not set'}"
+    )
+    print(
+        f"  OPENAI_API_KEY: {'Configured' if config.common.OPENAI_API_KEY else 'Not set'}"
+    )
+    print(
+        f"  TWITTER_API_KEY: {'Configured' if config.common.TWITTER_API_KEY else 'Not set'}"
+    )
+
+    # Telegram settings
+    print("\nTelegram:")
+    print(
+        f"  Primary chat ID: {'Configured' if config.common.TELEGRAM_CHAT_ID else 'Not set'}"
+    )
+
+    # Characters
+    print("\nConfigured Characters:")
+    for label, handle in _SORTED_CHARS:
+        print(f"  - {label} (@{handle})")
+
+    # LLM Provider availability
+    print("\nLLM Provider Support:")
+    print(
+        f"  Anthropic: {'Available' if _ANTHROPIC_AVAILABLE else 'Not available - Install with pip install anthropic'}"
+    )
+    print(
+        f"  OpenAI: {'Available' if _OPENAI_AVAILABLE else 'Not available - Install with pip install openai'}"
+    )
+
+    print(
+        "\nNote: To configure multiple LLM providers, set the TRANSLATION_MODELS environment variable."
+    )
+    print("Format: 'provider1:model1,provider2:model2,...'")
+    print("Example: 'anthropic:claude-3-7-sonnet-20250219,openai:gpt-4o'")
+    print("Translation will try each provider from left to right until successful.")
@@ -1,10 +1,23 @@
+import asyncio
+import contextlib
 import logging
-import os
 import datetime
-from typing import Dict, Any
+import itertools
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 import config
 from logging_handlers import setup_telegram_logger
 
+# Re-export tweet functionality so existing imports don't break
+from tweet import (
+    Tweet,
+    format_tweet_for_telegram,
+    parse_twitter_date,
+    search_tweets,
+)
+from telegram import send_telegram_message
+from db import store_translated_messages
+from translate import translate, TranslationError
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -12,9 +25,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Set up Telegram error logger if credentials are provided
+# Set up Telegram error logger if credentials are provided; the handler is kept
+# so other code (e.g. the CLI test commands) can send through it
+TELEGRAM_ERROR_HANDLER = None
 if config.common.TELEGRAM_ERROR_BOT_TOKEN and config.common.TELEGRAM_ERROR_CHAT_ID:
-    setup_telegram_logger(
+    TELEGRAM_ERROR_HANDLER = setup_telegram_logger(
         config.common.TELEGRAM_ERROR_BOT_TOKEN,
         config.common.TELEGRAM_ERROR_CHAT_ID,
         level=logging.ERROR,
@@ -23,9 +38,9 @@ if config.common.TELEGRAM_ERROR_BOT_TOKEN and config.common.TELEGRAM_ERROR_CHAT_
 else:
     logger.warning("Telegram error logging is disabled - missing bot token or chat ID")
 
-# Get environment variables
-TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
-TWITTER_API_KEY = os.getenv("TWITTER_API_KEY")
+# Settings read from the environment by config.common
+TELEGRAM_CHAT_ID = config.common.TELEGRAM_CHAT_ID
+TWITTER_API_KEY = config.common.TWITTER_API_KEY
 
 # Check for required environment variables
 required_vars = {"TELEGRAM_CHAT_ID": TELEGRAM_CHAT_ID}
@@ -37,14 +52,344 @@ if missing_vars:
         f"The following environment variables must be set: {', '.join(missing_vars)}"
     )
 
-# Re-export tweet functionality so existing imports don't break
-from tweet import (
-    Tweet,
-    format_tweet_for_telegram,
-    search_tweets,
-)
-from telegram import send_telegram_message
-from translate import translate, TranslationError
+# Maximum number of Telegram messages in flight at once
+TELEGRAM_SEND_CONCURRENCY = 8
+
+# Telegram's maximum message length, and the separator between tweets when
+# several are sent as one message (see config.common.TELEGRAM_BATCH_SIZE)
+TELEGRAM_MESSAGE_LIMIT = 4096
+TELEGRAM_BATCH_SEPARATOR = "\n\n━━━━━\n\n"
+
+# Sort key for tweets without a date, so they go after all dated tweets
+_LATEST_DATE = datetime.datetime.max.replace(tzinfo=datetime.timezone.utc)
+
+
+def _tweet_date_key(tweet: Dict[str, Any]) -> datetime.datetime:
+    """Sort key for raw tweet data: its date, or _LATEST_DATE if it has none."""
+    # Use the parsed date if the tweet has one, otherwise parse createdAt
+    if "parsed_date" in tweet:
+        parsed_date = tweet["parsed_date"]
+    else:
+        parsed_date = parse_twitter_date(tweet.get("createdAt"))
+    return _LATEST_DATE if parsed_date is None else parsed_date
+
+
+def _record_sent(send: Dict[str, Any], response: Dict[str, Any]) -> None:
+    """
+    Record a successful send: set the entry's "result", and its "row" with the
+    database record if a translation was sent.
+
+    Args:
+        send: The pending send that was delivered
+        response: The Telegram API response for the message it was sent in
+    """
+    tweet = send["tweet"]
+    as_character = send["character"]
+
+    # Keep a row for the database if the tweet was translated
+    telegram_message_id = response.get("result", {}).get("message_id")
+    if send["translated"] and telegram_message_id:
+        send["row"] = {
+            "telegram_message_id": telegram_message_id,
+            "tweet_id": tweet.id,
+            "tweet_url": tweet.twitterUrl
+            or tweet.url
+            or f"https://twitter.com/{tweet.author.userName if tweet.author else 'unknown'}/status/{tweet.id}",
+            "parent_tweet_id": tweet.inReplyToId,
+            "character_name": as_character.name,
+            "llm_provider": (
+                config.common.TRANSLATION_MODELS[0]
+                if config.common.TRANSLATION_MODELS
+                else None
+            ),
+            "translation_text": send["translated_text"],
+            "original_text": tweet.text,
+        }
+
+    if send["translated"]:
+        logger.info(
+            f"Successfully forwarded translated tweet {tweet.id} to Telegram as {as_character.name}"
+        )
+    else:
+        logger.info(
+            f"Successfully forwarded original tweet {tweet.id} to Telegram as {as_character.name} (translation failed)"
+        )
+
+    send["result"] = {
+        "tweet_id": tweet.id,
+        "forwarded": True,
+        "character": as_character.name,
+        "translated": send["translated"],
+    }
+
+
+def _next_batch(sends: List[Dict[str, Any]], start: int) -> List[Dict[str, Any]]:
+    """
+    Take the next batch of messages that can be sent as one Telegram message.
+
+    Args:
+        sends: Pending sends for a single character
+        start: Index of the first send in the batch
+
+    Returns:
+        Up to TELEGRAM_BATCH_SIZE sends whose joined text fits in one message
+        (always at least one)
+    """
+    batch = [sends[start]]
+    length = len(sends[start]["message"])
+    for send in sends[start + 1 : start + config.common.TELEGRAM_BATCH_SIZE]:
+        length += len(TELEGRAM_BATCH_SEPARATOR) + len(send["message"])
+        if length > TELEGRAM_MESSAGE_LIMIT:
+            break
+        batch.append(send)
+    return batch
+
+
+async def _send_in_order(
+    sends: List[Dict[str, Any]], semaphore: asyncio.Semaphore
+) -> None:
+    """
+    Send one character's pending messages to Telegram in order.
+    Each entry gets a "result" key with the outcome for its tweet, and a "row"
+    key with its database record if a translation was sent.
+    If TELEGRAM_BATCH_SIZE is above 1, consecutive messages are joined into one
+    Telegram message; if that fails, they are sent one by one.
+
+    Args:
+        sends: Pending sends for a single character, oldest first
+        semaphore: Limits how many messages are sent concurrently
+    """
+    start = 0
+    while start < len(sends):
+        batch = _next_batch(sends, start)
+        start += len(batch)
+        as_character = batch[0]["character"]
+
+        if len(batch) > 1:
+            try:
+                async with semaphore:
+                    response = await send_telegram_message(
+                        as_character,
+                        TELEGRAM_BATCH_SEPARATOR.join(
+                            send["message"] for send in batch
+                        ),
+                        # The tweets are sent one by one if this fails, and
+                        # those sends notify about errors themselves
+                        notify_on_error=False,
+                    )
+            except Exception as e:
+                logger.warning(
+                    f"Failed to send {len(batch)} tweets as one message, sending them one by one: {str(e)}"
+                )
+            else:
+                # Recorded outside the try, so the batch is never sent again
+                # once it has been delivered
+                for send in batch:
+                    _record_sent(send, response)
+                continue
+
+        for send in batch:
+            try:
+                async with semaphore:
+                    response = await send_telegram_message(
+                        as_character, send["message"]
+                    )
+            except Exception as e:
+                # Error is already logged in send_telegram_message
+                # Error notification is already sent in send_telegram_message
+                # Just add the result here
+                send["result"] = {
+                    "tweet_id": send["tweet"].id,
+                    "forwarded": False,
+                    "error": f"Failed to send to Telegram: {str(e)}",
+                }
+            else:
+                _record_sent(send, response)
+
+
+async def _prepare_tweet(
+    index: int,
+    tweet_data: Dict[str, Any],
+    forward_to_telegram: bool,
+    character_name: Optional[str],
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Parse, translate and format one tweet from a search response.
+
+    Args:
+        index: Position of the tweet in the response (for logging)
+        tweet_data: Raw tweet data from the Twitter API
+        forward_to_telegram: Whether the tweet will be forwarded to Telegram
+        character_name: Name of the character to forward as if the author isn't one
+
+    Returns:
+        Tuple of (result, pending send). The pending send is set if the tweet
+        has a message to send to Telegram; otherwise the result is set.
+    """
+    try:
+        # Log the raw tweet data structure before parsing
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Tweet %d raw data structure:", index + 1)
+            logger.debug("  Keys: %s", list(tweet_data.keys()))
+            if "author" in tweet_data and isinstance(tweet_data["author"], dict):
+                logger.debug("  Author keys: %s", list(tweet_data["author"].keys()))
+
+        # Build the model without validation; the data comes from the Twitter API
+        tweet = Tweet.from_trusted(tweet_data)
+
+        # Log the tweet text and author info
+        logger.info(f"Tweet {index + 1}: {tweet.text or 'No text'}")
+
+        # Dump the author fields for debugging
+        if tweet.author and logger.isEnabledFor(logging.DEBUG):
+            author = tweet.author
+            logger.debug(
+                "Author info - id: %s, name: %s, username fields: %s",
+                author.id,
+                author.name,
+                author.userName,
+            )
+
+        # Forward to Telegram if enabled
+        if forward_to_telegram:
+            try:
+                # Try to get character by userName or from specified character_name
+                as_character = None
+
+                # First try to get character from tweet author username
+                if tweet.author and tweet.author.userName:
+                    as_character = config.characters.get(tweet.author.userName)
+                    if as_character:
+                        logger.info(
+                            f"Found character {as_character.name} for @{tweet.author.userName}"
+                        )
+                    else:
+                        logger.info(f"No character found for @{tweet.author.userName}")
+
+                # If no character found and character_name was specified, use that
+                if not as_character and character_name:
+                    as_character = config.characters.get(character_name)
+                    if as_character:
+                        logger.info(f"Using specified character: {character_name}")
+                    else:
+                        logger.error(
+                            f"Specified character '{character_name}' not found"
+                        )
+
+                if as_character:
+                    # Always translate the tweet
+                    original_text = tweet.text or ""
+                    translated_text = None
+
+                    if original_text:
+                        try:
+                            logger.info("Translating tweet to Korean...")
+                            translated_text = await translate(original_text)
+                            logger.info("Translation successful")
+                        except TranslationError as e:
+                            logger.error(f"Translation error: {str(e)}")
+                        except Exception as e:
+                            logger.error(
+                                f"Unexpected error during translation: {str(e)}"
+                            )
+
+                    # Format the tweet (translated if available)
+                    if translated_text:
+                        # Show the translated text without copying the tweet
+                        formatted_message = format_tweet_for_telegram(
+                            tweet, override_text=translated_text
+                        )
+                    else:
+                        # Fall back to original if translation failed
+                        formatted_message = format_tweet_for_telegram(tweet)
+
+                    # The message is sent once every tweet has been prepared
+                    return None, {
+                        "tweet": tweet,
+                        "character": as_character,
+                        "message": formatted_message,
+                        "translated": bool(translated_text),
+                        "translated_text": translated_text,
+                    }
+                else:
+                    logger.warning(
+                        f"No matching character found for tweet from @{tweet.author.userName if tweet.author else 'unknown'}"
+                    )
+                    return {
+                        "tweet_id": tweet.id,
+                        "forwarded": False,
+                        "error": "No matching character found for forwarding",
+                    }, None
+            except Exception as e:
+                logger.error(f"Error forwarding tweet {tweet.id}: {str(e)}")
+                return {
+                    "tweet_id": tweet.id,
+                    "forwarded": False,
+                    "error": str(e),
+                }, None
+        else:
+            # Just record the tweet ID if not forwarding
+            return {"tweet_id": tweet.id, "forwarded": False}, None
+
+    except Exception as e:
+        logger.error(f"Error processing tweet {index + 1}: {str(e)}")
+        return {"error": str(e)}, None
+
+
+async def _search_pages(
+    query: str, query_type: str, cursor: str, limit: int
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield search result pages until limit tweets have been returned or there
+    are no more pages. The next page is fetched while the caller handles the
+    current one. Tweets already returned on an earlier page are left out.
+
+    Args:
+        query: Twitter search query
+        query_type: "Latest" or "Top"
+        cursor: Pagination cursor to start from
+        limit: Number of tweets wanted in total
+
+    Yields:
+        Search responses from search_tweets, in page order
+    """
+    remaining = limit
+    # IDs of tweets already returned; pagination can repeat tweets at page
+    # boundaries, and they shouldn't be forwarded twice
+    seen_ids = set()
+    next_page = asyncio.create_task(search_tweets(query, query_type, cursor))
+    try:
+        while next_page is not None:
+            page = await next_page
+            next_page = None
+
+            tweets = page.get("tweets", [])
+            if not tweets:
+                break
+
+            new_tweets = []
+            for tweet_data in tweets:
+                tweet_id = (
+                    tweet_data.get("id") if isinstance(tweet_data, dict) else None
+                )
+                if tweet_id is not None:
+                    if tweet_id in seen_ids:
+                        continue
+                    seen_ids.add(tweet_id)
+                new_tweets.append(tweet_data)
+            remaining -= len(new_tweets)
+
+            # Start fetching the next page only if more tweets are needed
+            next_cursor = page.get("next_cursor", "")
+            if remaining > 0 and page.get("has_next_page", False) and next_cursor:
+                next_page = asyncio.create_task(
+                    search_tweets(query, query_type, next_cursor)
+                )
+
+            yield {**page, "tweets": new_tweets}
+    finally:
+        if next_page is not None:
+            next_page.cancel()
 
 
 # Direct CLI functions for tweet search and forwarding
@@ -55,6 +400,7 @@ async def direct_search_and_forward(
     forward_to_telegram: bool = True,
     cursor: str = "",
     character_name: str = None,
+    search_results: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """
     Directly search for tweets using the Twitter API and forward them to Telegram.
@@ -67,6 +413,7 @@ async def direct_search_and_forward(
         forward_to_telegram: Whether to forward tweets to Telegram
         cursor: Pagination cursor for retrieving next page of results
         character_name: Name of the character to forward tweets as (if None, tries to determine from query)
+        search_results: Search response already fetched for this page; if given, the search is skipped
 
     Returns:
         Dictionary with results of the operation
@@ -77,10 +424,18 @@ async def direct_search_and_forward(
             logger.error("Missing TWITTER_API_KEY environment variable")
             return {"status": "error", "message": "TWITTER_API_KEY must be set"}
 
-        logger.info(f"Searching Twitter with query: {query}")
+        if search_results is None:
+            logger.info(f"Searching Twitter with query: {query}")
 
-        # Search for tweets
-        search_results = await search_tweets(query, query_type, cursor)
+            # Search for tweets, following the cursor until the limit is reached
+            collected = []
+            async with contextlib.aclosing(
+                _search_pages(query, query_type, cursor, limit)
+            ) as pages:
+                async for page in pages:
+                    search_results = page
+                    collected.extend(page.get("tweets", [])[: limit - len(collected)])
+            search_results = {**(search_results or {}), "tweets": collected}
 
         # Extract tweets from the response
         tweets = search_results.get("tweets", [])
@@ -89,196 +444,70 @@ async def direct_search_and_forward(
             logger.info("No tweets found")
             return {"status": "success", "message": "No tweets found", "count": 0}
 
-        logger.info(f"Found {len(tweets)} tweets")
+        logger.info("Found %d tweets", len(tweets))
 
-        # Limit the number of tweets to process
-        tweets = tweets[:limit]
+        # Take only the tweets within the limit
+        tweets = list(itertools.islice(tweets, limit))
 
         # Sort tweets by date (oldest first) before processing
         try:
-            # Create temporary list with (tweet, date) tuples for sorting
-            dated_tweets = []
-            for tweet in tweets:
-                parsed_date = None
-                # Try to get parsed date from tweet
-                if "parsed_date" in tweet:
-                    parsed_date = tweet["parsed_date"]
-                # Otherwise try to parse from createdAt
-                elif "createdAt" in tweet:
-                    try:
-                        parsed_date = datetime.datetime.strptime(
-                            tweet["createdAt"], "%a %b %d %H:%M:%S %z %Y"
-                        )
-                    except (ValueError, TypeError):
-                        # If parsing fails, use None (will end up at the end)
-                        pass
-                dated_tweets.append((tweet, parsed_date))
-
-            # Sort by date, with None dates at the end
-            # The tuple sort key: (is_none, date_value) ensures None values go last
-            sorted_tweets = [
-                t[0] for t in sorted(dated_tweets, key=lambda x: (x[1] is None, x[1]))
-            ]
-            tweets = sorted_tweets
+            tweets = sorted(tweets, key=_tweet_date_key)
             logger.info(f"Sorted {len(tweets)} tweets by date (oldest first)")
         except Exception as e:
             logger.warning(f"Failed to sort tweets by date: {str(e)}")
             logger.warning("Will process tweets in their original order")
 
         results = []
-
-        # Process each tweet
-        for i, tweet_data in enumerate(tweets):
-            try:
-                # Log the raw tweet data structure before parsing
-                logger.info(f"Tweet {i+1} raw data structure:")
-                logger.info(f"  Keys: {list(tweet_data.keys())}")
-                if "author" in tweet_data and isinstance(tweet_data["author"], dict):
-                    logger.info(f"  Author keys: {list(tweet_data['author'].keys())}")
-
-                # Parse the tweet data into our model
-                tweet = Tweet.parse_obj(tweet_data)
-
-                # Log the tweet text and author info
-                logger.info(f"Tweet {i+1}: {tweet.text or 'No text'}")
-
-                # Dump the full tweet model for debugging
-                if tweet.author:
-                    author = tweet.author
-                    logger.info(
-                        f"Author info - id: {author.id}, name: {author.name}, username fields: {author.userName}"
+        # Messages to send once every tweet has been processed
+        pending_sends = []
+
+        # Prepare tweets concurrently (translation is the slow part); sending
+        # happens below, in order per character
+        semaphore = asyncio.Semaphore(config.common.FORWARD_CONCURRENCY)
+
+        async def prepare(i, tweet_data):
+            async with semaphore:
+                return await _prepare_tweet(
+                    i, tweet_data, forward_to_telegram, character_name
+                )
+
+        prepared = await asyncio.gather(
+            *(prepare(i, tweet_data) for i, tweet_data in enumerate(tweets))
+        )
+        for result, send in prepared:
+            if send is not None:
+                # Reserve this tweet's slot in the results; it is filled in
+                # once the message has been sent
+                send["slot"] = len(results)
+                pending_sends.append(send)
+            results.append(result)
+
+        if pending_sends:
+            # Send concurrently across characters, but keep each character's
+            # messages in chronological order
+            groups: Dict[str, List[Dict[str, Any]]] = {}
+            for send in pending_sends:
+                groups.setdefault(send["character"].name, []).append(send)
+
+            semaphore = asyncio.Semaphore(TELEGRAM_SEND_CONCURRENCY)
+            await asyncio.gather(
+                *(_send_in_order(group, semaphore) for group in groups.values())
+            )
+
+            for send in pending_sends:
+                results[send["slot"]] = send["result"]
+
+            # Store all sent translations with a single insert
+            rows = [send["row"] for send in pending_sends if "row" in send]
+            if rows:
+                try:
+                    await store_translated_messages(rows)
+                except Exception as db_error:
+                    # Log but don't fail if database storage fails
+                    logger.error(
+                        f"Failed to store messages in database: {str(db_error)}"
                     )
 
-                # Forward to Telegram if enabled
-                if forward_to_telegram:
-                    try:
-                        # Try to get character by userName or from specified character_name
-                        as_character = None
-
-                        # First try to get character from tweet author username
-                        if tweet.author and tweet.author.userName:
-                            try:
-                                as_character = config.characters[tweet.author.userName]
-                                logger.info(
-                                    f"Found character {as_character.name} for @{tweet.author.userName}"
-                                )
-                            except (KeyError, AttributeError):
-                                logger.info(
-                                    f"No character found for @{tweet.author.userName}"
-                                )
-
-                        # If no character found and character_name was specified, use that
-                        if not as_character and character_name:
-                            try:
-                                as_character = getattr(
-                                    config.characters, character_name
-                                )
-                                logger.info(
-                                    f"Using specified character: {character_name}"
-                                )
-                            except (AttributeError, KeyError):
-                                logger.error(
-                                    f"Specified character '{character_name}' not found"
-                                )
-
-                        if as_character:
-                            # Always translate the tweet
-                            original_text = tweet.text or ""
-                            translated_text = None
-
-                            if original_text:
-                                try:
-                                    logger.info("Translating tweet to Korean...")
-                                    translated_text = await translate(original_text)
-                                    logger.info("Translation successful")
-                                except TranslationError as e:
-                                    logger.error(f"Translation error: {str(e)}")
-                                except Exception as e:
-                                    logger.error(
-                                        f"Unexpected error during translation: {str(e)}"
-                                    )
-
-                            # Format and send the tweet (translated if available)
-                            try:
-                                if translated_text:
-                                    # Create a copy of the tweet with translated text
-                                    tweet_dict = tweet.dict()
-                                    tweet_dict["text"] = translated_text
-                                    translated_tweet = Tweet.parse_obj(tweet_dict)
-                                    formatted_message = format_tweet_for_telegram(
-                                        translated_tweet
-                                    )
-
-                                    response = await send_telegram_message(
-                                        as_character, formatted_message
-                                    )
-                                    logger.info(
-                                        f"Successfully forwarded translated tweet {tweet.id} to Telegram as {as_character.name}"
-                                    )
-
-                                    # Store success result
-                                    results.append(
-                                        {
-                                            "tweet_id": tweet.id,
-                                            "forwarded": True,
-                                            "character": as_character.name,
-                                            "translated": True,
-                                        }
-                                    )
-                                else:
-                                    # Fall back to original if translation failed
-                                    formatted_message = format_tweet_for_telegram(tweet)
-                                    response = await send_telegram_message(
-                                        as_character, formatted_message
-                                    )
-                                    logger.info(
-                                        f"Successfully forwarded original tweet {tweet.id} to Telegram as {as_character.name} (translation failed)"
-                                    )
-
-                                    # Store success result
-                                    results.append(
-                                        {
-                                            "tweet_id": tweet.id,
-                                            "forwarded": True,
-                                            "character": as_character.name,
-                                            "translated": False,
-                                        }
-                                    )
-                            except Exception as e:
-                                # Error is already logged in send_telegram_message
-                                # Error notification is already sent in send_telegram_message
-                                # Just add the result here
-                                results.append(
-                                    {
-                                        "tweet_id": tweet.id,
-                                        "forwarded": False,
-                                        "error": f"Failed to send to Telegram: {str(e)}",
-                                    }
-                                )
-                        else:
-                            logger.warning(
-                                f"No matching character found for tweet from @{tweet.author.userName if tweet.author else 'unknown'}"
-                            )
-                            results.append(
-                                {
-                                    "tweet_id": tweet.id,
-                                    "forwarded": False,
-                                    "error": "No matching character found for forwarding",
-                                }
-                            )
-                    except Exception as e:
-                        logger.error(f"Error forwarding tweet {tweet.id}: {str(e)}")
-                        results.append(
-                            {"tweet_id": tweet.id, "forwarded": False, "error": str(e)}
-                        )
-                else:
-                    # Just record the tweet ID if not forwarding
-                    results.append({"tweet_id": tweet.id, "forwarded": False})
-
-            except Exception as e:
-                logger.error(f"Error processing tweet {i+1}: {str(e)}")
-                results.append({"error": str(e)})
-
         return {
             "status": "success",
             "query": query,
@@ -1,5 +1,6 @@
 import os
-from typing import List, Dict
+from types import MappingProxyType
+from typing import List, Mapping, Optional
 
 from .types import Character
 
@@ -18,22 +19,35 @@ _characters: List[str] = [
 
 
 class _Characters:
-    _character_config: Dict[str, Character] = {}
-    _twitter_handle_map: Dict[str, Character] = {}
+    _character_config: Mapping[str, Character] = {}
+    _twitter_handle_map: Mapping[str, Character] = {}
 
     def __setattr__(self, key: str, value: Character):
         self._character_config[key.lower()] = value
         self._twitter_handle_map[value.twitter_handle.lower()] = value
+        # Also store it as a plain attribute, so lowercase access like
+        # characters.mai is found without going through __getattr__
+        object.__setattr__(self, key.lower(), value)
 
     def __getattr__(self, key: str) -> Character:
+        # Only called for names not stored as attributes (e.g. "Polka")
         return self._character_config[key.lower()]
 
     def __getitem__(self, item: str) -> Character:
+        # Look up by Twitter handle first (the common case), then by name
         item = item.lower()
-        if item in self._twitter_handle_map.keys():
-            return self._twitter_handle_map[item]
-        else:
+        character = self._twitter_handle_map.get(item)
+        if character is None:
             return self._character_config[item]
+        return character
+
+    def get(self, item: str) -> Optional[Character]:
+        """Like characters[item], but returns None if there is no match."""
+        item = item.lower()
+        character = self._twitter_handle_map.get(item)
+        if character is None:
+            return self._character_config.get(item)
+        return character
 
 
 characters = _Characters()
@@ -60,4 +74,16 @@ for character in _characters:
         ),
     )
 
+# Characters are only read from here on, so freeze the lookup maps
+object.__setattr__(
+    characters,
+    "_character_config",
+    MappingProxyType(dict(characters._character_config)),
+)
+object.__setattr__(
+    characters,
+    "_twitter_handle_map",
+    MappingProxyType(dict(characters._twitter_handle_map)),
+)
+
 __all__ = ["characters"]
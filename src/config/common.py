@@ -8,6 +8,8 @@ TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 TWITTER_API_BASE_URL = "https://api.twitterapi.io"
 TWITTER_SEARCH_ENDPOINT = "/twitter/tweet/advanced_search"
 TWITTER_API_KEY = os.getenv("TWITTER_API_KEY")
+# Maximum number of Twitter API search requests per minute
+TWITTER_SEARCH_RATE_LIMIT = max(1, int(os.getenv("TWITTER_SEARCH_RATE_LIMIT", "600")))
 
 # Translation settings
 DEFAULT_TRANSLATION_MODELS = "anthropic:claude-3-7-sonnet-20250219"
@@ -27,6 +29,18 @@ if os.getenv("TRANSLATION_MODEL") and not os.getenv("TRANSLATION_MODELS"):
 if not TRANSLATION_MODELS:
     TRANSLATION_MODELS = [f"anthropic:{DEFAULT_TRANSLATION_MODEL}"]
 
+# Forwarding configuration
+# Number of tweets translated and formatted concurrently per search page
+FORWARD_CONCURRENCY = max(1, int(os.getenv("FORWARD_CONCURRENCY", "5")))
+# Number of consecutive tweets per character joined into one Telegram message
+# (1 sends every tweet as its own message)
+TELEGRAM_BATCH_SIZE = max(1, int(os.getenv("TELEGRAM_BATCH_SIZE", "1")))
+
+# Server configuration
+# Number of Uvicorn worker processes. Each worker opens its own database pool,
+# so the server uses up to WEB_CONCURRENCY * POSTGRES_POOL_MAX connections
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
 # Error logging configuration
 TELEGRAM_ERROR_BOT_TOKEN = os.getenv("TELEGRAM_ERROR_BOT_TOKEN")
 TELEGRAM_ERROR_CHAT_ID = os.getenv("TELEGRAM_ERROR_CHAT_ID")
@@ -41,3 +55,10 @@ POSTGRES_DSN = os.getenv(
     "POSTGRES_DSN",
     f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}",
 )
+# Connection pool size per process (the server runs WEB_CONCURRENCY processes)
+POSTGRES_POOL_MIN = int(os.getenv("POSTGRES_POOL_MIN", "2"))
+POSTGRES_POOL_MAX = max(POSTGRES_POOL_MIN, int(os.getenv("POSTGRES_POOL_MAX", "10")))
+# Queries after which a pooled connection is replaced
+POSTGRES_POOL_MAX_QUERIES = int(os.getenv("POSTGRES_POOL_MAX_QUERIES", "50000"))
+# Seconds an idle pooled connection is kept open before it is closed
+POSTGRES_POOL_IDLE_LIFETIME = float(os.getenv("POSTGRES_POOL_IDLE_LIFETIME", "300"))
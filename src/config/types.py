@@ -3,3 +3,7 @@ class Character:
         self.name: str = name
         self.twitter_handle: str = twitter_handle
         self.telegram_bot_token: str = telegram_bot_token
+        # The token never changes at runtime, so build the API URL once
+        self.send_message_url: str = (
+            f"https://api.telegram.org/bot{telegram_bot_token}/sendMessage"
+        )
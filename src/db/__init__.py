@@ -4,16 +4,18 @@ Handles PostgreSQL connections and operations.
 """
 
 import asyncio
+import functools
 import logging
+import time
+import uuid
 import asyncpg
 from typing import Optional, Dict, Any, List, Tuple
 import config
 import os
-import subprocess
 import sys
-import glob
 import re
 from pathlib import Path
+from .retry import retry_with_backoff, retry_db_operation
 
 # Configure module-specific logger
 logger = logging.getLogger(__name__)
@@ -21,10 +23,42 @@ logger = logging.getLogger(__name__)
 # Global connection pool
 _pool: Optional[asyncpg.Pool] = None
 
-async def _setup_connection(conn: asyncpg.Connection) -> None:
-    await conn.execute("SET application_name = 'lovelive-bluebird-twitter-to-telegram'")
+# Bytes read from the start of a migration file when looking for its revision ID
+_MIGRATION_HEADER_SIZE = 2048
+
+# Regular expression to extract sequence numbers from migration filenames
+# Expects filenames like: 001_20250608_initial_schema.py
+_MIGRATION_FILENAME_RE = re.compile(r"^(\d+)_.*\.py$")
+
+# Regular expression to extract revision IDs from migration files
+# This pattern matches both "revision = '123abc'" and "revision: str = '123abc'" formats.
+# The patterns are bytes: the IDs are ASCII, so files are searched without decoding
+_REVISION_RE = re.compile(rb"revision(?:\s*:\s*\w+)?\s*=\s*['\"]([0-9a-f]+)['\"]")
+
+# Fallback for a revision ID only given in a comment like "Revision ID: 123abc"
+_REVISION_COMMENT_RE = re.compile(rb"Revision ID:\s*([0-9a-f]+)")
+
+def _uuid7() -> uuid.UUID:
+    """
+    Generate a time-ordered UUIDv7 (RFC 9562) for a new record's primary key.
+    The leading 48 bits are the Unix time in milliseconds, so new rows land at
+    the end of the primary key index instead of at random positions.
+
+    Returns:
+        uuid.UUID: The generated UUID
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10))
+    # Set the version (7) and variant (0b10) bits
+    value = (value & ~(0xF << 76)) | (0x7 << 76)
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)
+    return uuid.UUID(int=value)
+
+# Session settings sent in each connection's startup message
+_SERVER_SETTINGS = {
+    "application_name": "lovelive-bluebird-twitter-to-telegram",
     # Set a statement timeout to prevent long-running queries
-    await conn.execute("SET statement_timeout = '30s'")
+    "statement_timeout": "30s",
+}
 
 async def _create_connection_pool() -> asyncpg.Pool:
     """
@@ -36,17 +70,27 @@ async def _create_connection_pool() -> asyncpg.Pool:
     """
     logger.info(f"Creating database connection pool to {config.common.POSTGRES_HOST}")
     
-    # Create the connection pool with a setup callback for each new connection
+    # Create the connection pool
     return await asyncpg.create_pool(
         dsn=config.common.POSTGRES_DSN,
-        min_size=2,
-        max_size=10,
-        # This function is called for each new connection
-        setup=_setup_connection,
+        min_size=config.common.POSTGRES_POOL_MIN,
+        max_size=config.common.POSTGRES_POOL_MAX,
+        # Replace connections after many queries, and close ones left idle so
+        # stale CockroachDB connections aren't handed out
+        max_queries=config.common.POSTGRES_POOL_MAX_QUERIES,
+        max_inactive_connection_lifetime=config.common.POSTGRES_POOL_IDLE_LIFETIME,
+        # Session settings go in the connection handshake instead of a SET
+        # round trip each time a connection is acquired
+        server_settings=_SERVER_SETTINGS,
         # Connection timeout (5 seconds)
         timeout=5.0,
         # CockroachDB can sometimes be slower to respond
         command_timeout=10.0,
+        # Each connection keeps its prepared statements; the schema only changes
+        # through migrations, so don't expire them, and leave room for the
+        # multi-row inserts (one statement per batch size) alongside the lookups
+        statement_cache_size=256,
+        max_cached_statement_lifetime=0,
     )
 
 
@@ -62,9 +106,6 @@ async def get_connection_pool() -> asyncpg.Pool:
 
     if _pool is None:
         try:
-            # Import retry utility here to avoid circular imports
-            from .retry import retry_with_backoff
-            
             # Retry connection pool creation with backoff
             _pool = await retry_with_backoff(
                 _create_connection_pool,
@@ -90,48 +131,28 @@ async def close_connection_pool():
         logger.info("Database connection pool closed")
 
 
-async def _check_table_exists(
-    conn: asyncpg.Connection, 
-    table_name: str
-) -> bool:
-    """
-    Helper function to check if a table exists.
-    This function is used by get_current_schema_version and is designed to be retried.
-    Uses an explicit transaction to avoid "not in a transaction" errors.
-
-    Args:
-        conn: The database connection to use
-        table_name: The name of the table to check
-
-    Returns:
-        bool: True if the table exists, False otherwise
-    """
-    # Start an explicit transaction to avoid "not in a transaction" errors
-    async with conn.transaction():
-        return await conn.fetchval(f"""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'public' 
-                AND table_name = '{table_name}'
-            )
-        """)
-
-
-async def _fetch_schema_version(conn: asyncpg.Connection) -> Optional[str]:
+async def _fetch_schema_version(
+    conn: asyncpg.Connection
+) -> Tuple[bool, Optional[str]]:
     """
     Helper function to fetch the current schema version.
-    This function is used by get_current_schema_version and is designed to be retried.
-    Uses an explicit transaction to avoid "not in a transaction" errors.
+    This function is used by get_current_schema_version and check_schema_version
+    and is designed to be retried. A missing alembic_version table is detected
+    from the query's error, so this takes one round trip instead of checking
+    information_schema first.
 
     Args:
         conn: The database connection to use
 
     Returns:
-        Optional[str]: The current schema version
+        Tuple[bool, Optional[str]]: Whether the alembic_version table exists,
+        and the current schema version
     """
-    # Start an explicit transaction to avoid "not in a transaction" errors
-    async with conn.transaction():
-        return await conn.fetchval("SELECT version_num FROM alembic_version")
+    try:
+        # A single read runs in its own implicit transaction
+        return True, await conn.fetchval("SELECT version_num FROM alembic_version")
+    except asyncpg.exceptions.UndefinedTableError:
+        return False, None
 
 
 async def get_current_schema_version() -> Optional[str]:
@@ -142,34 +163,26 @@ async def get_current_schema_version() -> Optional[str]:
         str: The current schema version or None if not found/table doesn't exist
     """
     try:
-        from .retry import retry_db_operation
-        
         pool = await get_connection_pool()
         
         async with pool.acquire() as conn:
-            # Check if alembic_version table exists with retry
-            table_exists = await retry_db_operation(
-                _check_table_exists,
-                conn,
-                "alembic_version"
+            # Get the current version with retry
+            table_exists, version = await retry_db_operation(
+                _fetch_schema_version,
+                conn
             )
             
             if not table_exists:
                 logger.warning("alembic_version table does not exist - database has not been initialized")
                 return None
             
-            # Get the current version with retry
-            version = await retry_db_operation(
-                _fetch_schema_version,
-                conn
-            )
-            
             return version
     except Exception as e:
         logger.error(f"Failed to check database schema version: {str(e)}")
         return None
 
 
+@functools.lru_cache(maxsize=1)
 def get_expected_schema_version() -> str:
     """
     Dynamically determine the expected database schema version from the most recent Alembic migration.
@@ -178,6 +191,9 @@ def get_expected_schema_version() -> str:
     filenames (which should follow the pattern 'seq_date_comment.py' where seq is a number),
     and returns the revision ID from the file with the highest sequence number.
     
+    Migration files don't change while the process runs, so the result is cached;
+    call get_expected_schema_version.cache_clear() to scan the directory again.
+    
     Returns:
         str: The expected schema version (revision ID of the most recent migration)
     """
@@ -189,75 +205,63 @@ def get_expected_schema_version() -> str:
     # Path to Alembic versions directory
     versions_dir = os.path.join(project_root, "alembic", "versions")
     
-    # Find all migration files
-    migration_files = glob.glob(os.path.join(versions_dir, "*.py"))
+    # Find the migration files and their sequence numbers from the filenames alone
+    migrations = []
+    try:
+        with os.scandir(versions_dir) as entries:
+            for entry in entries:
+                # is_file() uses the type from the directory listing, so this
+                # doesn't stat each entry
+                if not entry.name.endswith(".py") or not entry.is_file():
+                    continue
+                
+                filename_match = _MIGRATION_FILENAME_RE.match(entry.name)
+                if not filename_match:
+                    logger.warning(f"Migration file {entry.name} does not follow the expected naming pattern")
+                    continue
+                
+                migrations.append((int(filename_match.group(1)), entry.name, entry.path))
+    except OSError as e:
+        logger.error(f"Could not read migration directory {versions_dir}: {str(e)}")
+        return ""
     
-    if not migration_files:
+    if not migrations:
         logger.error(f"No migration files found in {versions_dir}")
         return ""
     
-    # Regular expression to extract sequence numbers from filenames
-    # Expects filenames like: 001_20250608_initial_schema.py
-    filename_pattern = re.compile(r"^(\d+)_.*\.py$")
-    
-    # Regular expression to extract revision IDs from migration files
-    # This pattern matches both "revision = '123abc'" and "revision: str = '123abc'" formats
-    revision_pattern = re.compile(r"revision(?:\s*:\s*\w+)?\s*=\s*['\"]([0-9a-f]+)['\"]")
-    
-    # Dictionary to store sequence numbers, file paths, and revision IDs
-    migrations = {}
-    
-    # Parse each migration file to extract sequence number and revision ID
-    for file_path in migration_files:
-        filename = os.path.basename(file_path)
-        filename_match = filename_pattern.match(filename)
-        
-        if not filename_match:
-            logger.warning(f"Migration file {filename} does not follow the expected naming pattern")
-            continue
-        
+    # Only the newest migration's revision ID is needed, so read files from the
+    # highest sequence number down and stop at the first one with a revision ID
+    for seq_num, filename, file_path in sorted(migrations, reverse=True):
         try:
-            # Extract sequence number from filename
-            seq_num = int(filename_match.group(1))
-            
-            # Extract revision ID from file content
-            with open(file_path, 'r') as f:
-                content = f.read()
-                
-                # Try to match revision ID in different formats
-                revision_match = revision_pattern.search(content)
-                
-                # If not found, also try to find it in a comment line like "Revision ID: 123abc"
+            with open(file_path, 'rb') as f:
+                # The revision ID is in the header; read the rest only if it isn't there
+                content = f.read(_MIGRATION_HEADER_SIZE)
+                revision_match = _REVISION_RE.search(content)
                 if not revision_match:
-                    revision_id_comment = re.search(r"Revision ID:\s*([0-9a-f]+)", content)
-                    if revision_id_comment:
-                        revision_id = revision_id_comment.group(1)
-                        logger.info(f"Found revision ID in comment: {revision_id}")
-                    else:
-                        logger.warning(f"Could not find revision ID in {filename}")
-                        continue
+                    content += f.read()
+                    revision_match = _REVISION_RE.search(content)
+            
+            # If not found, also try to find it in a comment line like "Revision ID: 123abc"
+            if not revision_match:
+                revision_id_comment = _REVISION_COMMENT_RE.search(content)
+                if revision_id_comment:
+                    revision_id = revision_id_comment.group(1).decode('ascii')
+                    logger.info(f"Found revision ID in comment: {revision_id}")
                 else:
-                    revision_id = revision_match.group(1)
-                migrations[seq_num] = {
-                    'file_path': file_path,
-                    'revision_id': revision_id,
-                    'filename': filename
-                }
+                    logger.warning(f"Could not find revision ID in {filename}")
+                    continue
+            else:
+                revision_id = revision_match.group(1).decode('ascii')
         except Exception as e:
             logger.warning(f"Failed to parse migration file {filename}: {str(e)}")
+            continue
+        
+        logger.info(f"Latest migration (seq: {seq_num}) is {revision_id} from {filename}")
+        
+        return revision_id
     
-    if not migrations:
-        logger.error("Could not find any valid migration files with the expected naming pattern")
-        return ""
-    
-    # Get the migration with the highest sequence number
-    latest_seq_num = max(migrations.keys())
-    latest_migration = migrations[latest_seq_num]
-    latest_revision = latest_migration['revision_id']
-    
-    logger.info(f"Latest migration (seq: {latest_seq_num}) is {latest_revision} from {latest_migration['filename']}")
-    
-    return latest_revision
+    logger.error("Could not find any valid migration files with the expected naming pattern")
+    return ""
 
 
 async def check_schema_version() -> bool:
@@ -282,23 +286,12 @@ async def check_schema_version() -> bool:
         current_version = None
         
         async with pool.acquire() as conn:
-            # First check if the table exists
-            async with conn.transaction():
-                table_exists = await conn.fetchval("""
-                    SELECT EXISTS (
-                        SELECT FROM information_schema.tables 
-                        WHERE table_schema = 'public' 
-                        AND table_name = 'alembic_version'
-                    )
-                """)
-                
-                if not table_exists:
-                    logger.warning("alembic_version table does not exist - database has not been initialized")
-                    return False
+            # Get the version; this also tells us whether the table exists
+            table_exists, current_version = await _fetch_schema_version(conn)
             
-            # Then get the version
-            async with conn.transaction():
-                current_version = await conn.fetchval("SELECT version_num FROM alembic_version")
+            if not table_exists:
+                logger.warning("alembic_version table does not exist - database has not been initialized")
+                return False
         
         # Compare versions
         if current_version is None:
@@ -324,30 +317,34 @@ def run_migrations():
     This should ONLY be run from the CLI, not automatically by the server.
     """
     try:
+        # Alembic is in the optional "alembic" dependency group, so it's only
+        # imported here
+        from alembic import command
+        from alembic.config import Config
+
         # Get the project root directory
         project_root = os.path.dirname(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         )
 
-        # Set environment variables for Alembic
-        env = os.environ.copy()
-        env["POSTGRES_DSN"] = config.common.POSTGRES_DSN
+        # Run Alembic in this process rather than starting an `alembic upgrade`
+        # subprocess; env.py reads the DSN from config.common
+        alembic_cfg = Config(os.path.join(project_root, "alembic.ini"))
+        alembic_cfg.set_main_option(
+            "script_location", os.path.join(project_root, "alembic")
+        )
+        # Keep this process's logging setup instead of alembic.ini's
+        alembic_cfg.attributes["configure_logger"] = False
 
         # Run Alembic upgrade
         logger.info("Running database migrations with Alembic...")
-        result = subprocess.run(
-            ["alembic", "upgrade", "head"],
-            cwd=project_root,
-            env=env,
-            capture_output=True,
-            text=True,
-        )
+        try:
+            command.upgrade(alembic_cfg, "head")
+        except Exception as e:
+            logger.error(f"Database migration failed: {str(e)}")
+            raise
 
-        if result.returncode == 0:
-            logger.info(f"Database migrations completed successfully: {result.stdout}")
-        else:
-            logger.error(f"Database migration failed: {result.stderr}")
-            raise Exception(f"Database migration failed: {result.stderr}")
+        logger.info("Database migrations completed successfully")
 
     except Exception as e:
         logger.error(f"Failed to run database migrations: {str(e)}")
@@ -356,6 +353,7 @@ def run_migrations():
 
 async def _insert_translated_message(
     conn: asyncpg.Connection,
+    record_id: uuid.UUID,
     telegram_message_id: int,
     tweet_id: str,
     tweet_url: str,
@@ -364,14 +362,14 @@ async def _insert_translated_message(
     original_text: str,
     parent_tweet_id: Optional[str] = None,
     llm_provider: Optional[str] = None,
-) -> Any:
+) -> uuid.UUID:
     """
     Helper function to insert a translated message record.
     This function is used by store_translated_message and is designed to be retried.
-    Supports both integer and UUID primary keys.
 
     Args:
         conn: The database connection to use
+        record_id: The primary key for the new record
         telegram_message_id: The Telegram message ID
         tweet_id: The Tweet ID
         tweet_url: The Tweet URL
@@ -382,16 +380,16 @@ async def _insert_translated_message(
         llm_provider: The LLM provider used for translation
 
     Returns:
-        Any: The ID of the inserted record (can be int or UUID)
+        uuid.UUID: The ID of the inserted record
     """
-    row = await conn.fetchrow(
+    await conn.execute(
         """
     INSERT INTO translated_messages 
-    (telegram_message_id, tweet_id, tweet_url, parent_tweet_id, character_name, 
+    (id, telegram_message_id, tweet_id, tweet_url, parent_tweet_id, character_name, 
      llm_provider, translation_text, original_text)
-    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-    RETURNING id
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
     """,
+        record_id,
         telegram_message_id,
         tweet_id,
         tweet_url,
@@ -402,7 +400,7 @@ async def _insert_translated_message(
         original_text,
     )
     
-    return row["id"]
+    return record_id
 
 
 async def store_translated_message(
@@ -414,10 +412,10 @@ async def store_translated_message(
     original_text: str,
     parent_tweet_id: Optional[str] = None,
     llm_provider: Optional[str] = None,
-) -> Any:
+) -> uuid.UUID:
     """
     Store a translated message in the database with retry capability.
-    Supports both integer and UUID primary keys.
+    The UUIDv7 primary key is generated here, so retries reuse the same ID.
 
     Args:
         telegram_message_id: The Telegram message ID
@@ -430,10 +428,8 @@ async def store_translated_message(
         llm_provider: The LLM provider used for translation
 
     Returns:
-        Any: The ID of the inserted record (can be int or UUID)
+        uuid.UUID: The ID of the inserted record
     """
-    from .retry import retry_db_operation
-    
     pool = await get_connection_pool()
 
     async with pool.acquire() as conn:
@@ -441,6 +437,7 @@ async def store_translated_message(
         record_id = await retry_db_operation(
             _insert_translated_message,
             conn,
+            _uuid7(),
             telegram_message_id,
             tweet_id,
             tweet_url,
@@ -457,6 +454,94 @@ async def store_translated_message(
         return record_id
 
 
+# Columns written for each translated message, in insert order
+_TRANSLATED_MESSAGE_COLUMNS = (
+    "id",
+    "telegram_message_id",
+    "tweet_id",
+    "tweet_url",
+    "parent_tweet_id",
+    "character_name",
+    "llm_provider",
+    "translation_text",
+    "original_text",
+)
+
+# Maximum rows per INSERT statement; PostgreSQL allows at most 65535 bind
+# parameters per statement
+_INSERT_BATCH_ROWS = 1000
+
+
+async def _insert_translated_messages(
+    conn: asyncpg.Connection,
+    rows: List[Dict[str, Any]],
+) -> None:
+    """
+    Helper function to insert several translated message records at once.
+    This function is used by store_translated_messages and is designed to be retried.
+    Rows are written by multi-row INSERTs (up to _INSERT_BATCH_ROWS rows each)
+    inside one transaction.
+
+    Args:
+        conn: The database connection to use
+        rows: The records to insert, keyed by column name
+    """
+    width = len(_TRANSLATED_MESSAGE_COLUMNS)
+
+    async with conn.transaction():
+        # Large backfills are split into several statements, all in the same
+        # transaction, to stay under the bind parameter limit
+        for start in range(0, len(rows), _INSERT_BATCH_ROWS):
+            values = []
+            args = []
+            for i, row in enumerate(rows[start : start + _INSERT_BATCH_ROWS]):
+                placeholders = ", ".join(f"${i * width + j + 1}" for j in range(width))
+                values.append(f"({placeholders})")
+                args.extend(row.get(column) for column in _TRANSLATED_MESSAGE_COLUMNS)
+
+            await conn.execute(
+                f"""
+            INSERT INTO translated_messages 
+            ({", ".join(_TRANSLATED_MESSAGE_COLUMNS)})
+            VALUES {", ".join(values)}
+            """,
+                *args,
+            )
+
+
+async def store_translated_messages(rows: List[Dict[str, Any]]) -> int:
+    """
+    Store several translated messages in the database with retry capability.
+    Uses one round-trip instead of one per message.
+
+    Args:
+        rows: The records to store. Each needs telegram_message_id, tweet_id,
+            tweet_url, character_name, translation_text and original_text, and
+            may have parent_tweet_id and llm_provider.
+
+    Returns:
+        int: The number of records stored
+    """
+    if not rows:
+        return 0
+
+    pool = await get_connection_pool()
+
+    # Generate the UUIDv7 primary keys up front so retries reuse them
+    rows = [{**row, "id": _uuid7()} for row in rows]
+
+    async with pool.acquire() as conn:
+        # Wrap the database operation with retry logic
+        await retry_db_operation(
+            _insert_translated_messages,
+            conn,
+            rows,
+        )
+
+        logger.info(f"Stored {len(rows)} translated messages")
+        return len(rows)
+
+
 async def _fetch_telegram_message_id(
     conn: asyncpg.Connection, 
     tweet_id: str
@@ -492,8 +577,6 @@ async def get_telegram_message_id_for_tweet(tweet_id: str) -> Optional[int]:
     Returns:
         Optional[int]: The Telegram message ID, or None if not found
     """
-    from .retry import retry_db_operation
-    
     pool = await get_connection_pool()
 
     async with pool.acquire() as conn:
@@ -509,6 +592,17 @@ async def get_telegram_message_id_for_tweet(tweet_id: str) -> Optional[int]:
         return None
 
 
+# Recent translations by a character; the only query for translation history,
+# so every caller shares one prepared statement
+_SELECT_TRANSLATION_HISTORY_SQL = """
+        SELECT tweet_id, translation_text, original_text
+        FROM translated_messages 
+        WHERE character_name = $1
+        ORDER BY created_at DESC
+        LIMIT $2
+        """
+
+
 async def _fetch_translation_history(
     conn: asyncpg.Connection,
     character_name: str, 
@@ -526,22 +620,12 @@ async def _fetch_translation_history(
     Returns:
         List[asyncpg.Record]: List of translation records
     """
-    return await conn.fetch(
-        """
-        SELECT tweet_id, translation_text, original_text
-        FROM translated_messages 
-        WHERE character_name = $1
-        ORDER BY created_at DESC
-        LIMIT $2
-        """,
-        character_name,
-        limit,
-    )
+    return await conn.fetch(_SELECT_TRANSLATION_HISTORY_SQL, character_name, limit)
 
 
 async def get_translation_history_for_character(
     character_name: str, limit: int = 10
-) -> List[Dict[str, Any]]:
+) -> List[asyncpg.Record]:
     """
     Get recent translation history for a character to use as reference with retry capability.
 
@@ -550,10 +634,10 @@ async def get_translation_history_for_character(
         limit: Maximum number of translations to return
 
     Returns:
-        List[Dict[str, Any]]: List of recent translations
+        List[asyncpg.Record]: List of recent translations. Records support
+        read-only mapping access (row["translation_text"], row.get(...)), so
+        they are returned as-is rather than copied into dicts.
     """
-    from .retry import retry_db_operation
-    
     pool = await get_connection_pool()
 
     async with pool.acquire() as conn:
@@ -565,13 +649,12 @@ async def get_translation_history_for_character(
             limit,
         )
 
-        return [dict(row) for row in rows]
+        return rows
 
 
 async def check_db_connection() -> Tuple[bool, Optional[str]]:
     """
     Check database connectivity by attempting a simple query.
-    Uses direct transaction handling to avoid issues.
     
     Returns:
         Tuple[bool, Optional[str]]: A tuple containing:
@@ -582,14 +665,14 @@ async def check_db_connection() -> Tuple[bool, Optional[str]]:
         # Get connection pool (or create if not exists)
         pool = await get_connection_pool()
         
-        # Perform a simple query with explicit transaction
+        # Perform a simple query
         async with pool.acquire() as conn:
             # Use a simple query that works on both PostgreSQL and CockroachDB
             query = "SELECT 1 as connected"
             
-            # Use explicit transaction
-            async with conn.transaction():
-                result = await conn.fetchval(query)
+            # A single read needs no explicit transaction (BEGIN and COMMIT
+            # would be two more round trips)
+            result = await conn.fetchval(query)
             
             if result == 1:
                 logger.debug("Database health check passed")
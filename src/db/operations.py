@@ -5,7 +5,7 @@ Database operations for translation-related functionality.
 import logging
 from typing import List, Dict, Any
 
-from . import get_connection_pool
+from . import get_translation_history_for_character
 
 # Configure module-specific logger
 logger = logging.getLogger(__name__)
@@ -24,22 +24,9 @@ async def get_reference_translations(
     Returns:
         List of dictionaries with original and translated text pairs
     """
-    pool = await get_connection_pool()
-
-    async with pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-        SELECT original_text, translation_text
-        FROM translated_messages
-        WHERE character_name = $1
-        ORDER BY created_at DESC
-        LIMIT $2
-        """,
-            character_name,
-            limit,
-        )
-
-        return [
-            {"original": row["original_text"], "translated": row["translation_text"]}
-            for row in rows
-        ]
+    rows = await get_translation_history_for_character(character_name, limit)
+
+    return [
+        {"original": row["original_text"], "translated": row["translation_text"]}
+        for row in rows
+    ]
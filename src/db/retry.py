@@ -5,6 +5,7 @@ Utility functions for retrying database operations with exponential backoff.
 import asyncio
 import logging
 import random
+import re
 from typing import TypeVar, Callable, Awaitable, Any, Optional, List, Type
 import asyncpg
 
@@ -59,6 +60,18 @@ COCKROACHDB_RETRY_MESSAGES = [
     "transaction is too large to complete"
 ]
 
+# The retryable types that are retried whatever their message (PostgresError
+# in general is only retried for the CockroachDB messages above)
+_ALWAYS_RETRYABLE_EXCEPTIONS = tuple(
+    exc_type for exc_type in DEFAULT_RETRYABLE_EXCEPTIONS
+    if exc_type is not asyncpg.exceptions.PostgresError
+)
+
+# Matches any of COCKROACHDB_RETRY_MESSAGES (case-insensitive) in one pass
+_COCKROACHDB_RETRY_RE = re.compile(
+    "|".join(re.escape(msg) for msg in COCKROACHDB_RETRY_MESSAGES), re.IGNORECASE
+)
+
 def is_retryable_error(e: Exception) -> bool:
     """
     Determine if an exception is retryable, with special handling for CockroachDB errors.
@@ -70,20 +83,36 @@ def is_retryable_error(e: Exception) -> bool:
         bool: True if the exception is retryable, False otherwise
     """
     # Check if it's one of our explicitly defined retryable exception types
-    if any(isinstance(e, exc_type) for exc_type in DEFAULT_RETRYABLE_EXCEPTIONS if exc_type is not asyncpg.exceptions.PostgresError):
+    if isinstance(e, _ALWAYS_RETRYABLE_EXCEPTIONS):
         return True
     
     # For PostgresError, check if it's a CockroachDB-specific error message
     if isinstance(e, asyncpg.exceptions.PostgresError):
-        error_str = str(e).lower()
-        for retry_msg in COCKROACHDB_RETRY_MESSAGES:
-            if retry_msg.lower() in error_str:
-                logger.info(f"Detected CockroachDB retryable error: {error_str}")
-                return True
+        error_str = str(e)
+        if _COCKROACHDB_RETRY_RE.search(error_str):
+            logger.info(f"Detected CockroachDB retryable error: {error_str.lower()}")
+            return True
     
     return False
 
 
+def _is_serialization_failure(e: Exception, error_str: str) -> bool:
+    """
+    Check whether an exception is a serialization failure (SQLSTATE 40001),
+    which CockroachDB expects clients to retry right away.
+    
+    Args:
+        e: The exception to check
+        error_str: str(e), computed once by the caller
+        
+    Returns:
+        bool: True if the exception is a serialization failure
+    """
+    if isinstance(e, asyncpg.exceptions.SerializationError):
+        return True
+    return isinstance(e, asyncpg.exceptions.PostgresError) and "40001" in error_str
+
+
 async def retry_with_backoff(
     operation: Callable[..., Awaitable[T]],
     *args: Any,
@@ -131,22 +160,21 @@ async def retry_with_backoff(
         
         except Exception as e:
             last_exception = e
+            error_str = str(e)
             
             # Check if this exception is retryable
             if not is_retryable_error(e):
                 # Not a retryable exception, reraise immediately
-                logger.warning(f"Non-retryable exception in {operation.__name__}: {str(e)}")
+                logger.warning(f"Non-retryable exception in {operation.__name__}: {error_str}")
                 raise
             
             # Check if we've reached max retries
             if retries >= max_retries:
-                logger.error(f"Max retries ({max_retries}) reached for {operation.__name__}: {str(e)}")
+                logger.error(f"Max retries ({max_retries}) reached for {operation.__name__}: {error_str}")
                 raise
             
             # For CockroachDB serialization errors, use a more aggressive retry strategy
-            if isinstance(e, asyncpg.exceptions.SerializationError) or (
-                isinstance(e, asyncpg.exceptions.PostgresError) and "40001" in str(e)
-            ):
+            if _is_serialization_failure(e, error_str):
                 # For serialization failures, use a different backoff strategy
                 # CockroachDB docs recommend immediate retry for serialization failures
                 # with exponential backoff only after multiple failures
@@ -171,7 +199,7 @@ async def retry_with_backoff(
             final_backoff = max(0.001, backoff_time + jitter_amount)  # Ensure positive backoff
             
             logger.warning(
-                f"Retryable error in {operation.__name__}: {str(e)}. "
+                f"Retryable error in {operation.__name__}: {error_str}. "
                 f"Retrying in {final_backoff:.3f}s (attempt {retries+1}/{max_retries})"
             )
             
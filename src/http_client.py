@@ -0,0 +1,98 @@
+"""
+Shared HTTP client for outgoing API requests.
+Keeps connections (and TLS sessions) to the Telegram and Twitter APIs alive
+between requests instead of opening a new client per call.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+
+# Configure module-specific logger
+logger = logging.getLogger(__name__)
+
+# Global HTTP client
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get or create the shared HTTP client.
+
+    Returns:
+        httpx.AsyncClient: The shared client (HTTP/2, with keepalive)
+    """
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+
+    return _client
+
+
+class AsyncRateLimiter:
+    """
+    Token bucket limiting how many requests are started per time period.
+    Allows bursts up to max_rate, then spaces requests out evenly.
+
+    Usage:
+        async with limiter:
+            response = await client.get(...)
+    """
+
+    def __init__(self, max_rate: float, time_period: float = 60.0):
+        """
+        Args:
+            max_rate: Maximum number of requests per time period
+            time_period: Length of the time period in seconds
+
+        Raises:
+            ValueError: If max_rate or time_period is not positive
+        """
+        if max_rate <= 0:
+            raise ValueError(f"max_rate must be positive, got {max_rate}")
+        if time_period <= 0:
+            raise ValueError(f"time_period must be positive, got {time_period}")
+
+        self.max_rate = max_rate
+        self._rate_per_sec = max_rate / time_period
+        self._level = 0.0
+        self._last_check = 0.0
+
+    async def acquire(self):
+        """Wait until a request can be started without exceeding the rate."""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Drain the bucket for the time elapsed since the last check
+            now = loop.time()
+            elapsed = now - self._last_check
+            self._level = max(0.0, self._level - elapsed * self._rate_per_sec)
+            self._last_check = now
+
+            if self._level + 1 <= self.max_rate:
+                self._level += 1
+                return
+
+            await asyncio.sleep((self._level + 1 - self.max_rate) / self._rate_per_sec)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return None
+
+
+async def close_http_client():
+    """Close the shared HTTP client."""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+        logger.info("HTTP client closed")
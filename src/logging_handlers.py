@@ -1,37 +1,159 @@
 import logging
 import asyncio
+import collections
 import httpx
-from typing import Dict, Any
+import orjson
+from typing import Deque, Dict, Any, List, Optional
 import socket
+import threading
 
 # Configure module-specific logger
 logger = logging.getLogger(__name__)
+# Failures to send log messages are logged here; TelegramLogHandler ignores
+# records from this logger, so they aren't reported through Telegram
+_send_logger = logging.getLogger(f"{__name__}.send")
+
+# Longest log message sent to Telegram (its limit is 4096 characters), and the
+# separator between records sent together in one message
+TELEGRAM_LOG_MESSAGE_LIMIT = 4000
+LOG_BATCH_SEPARATOR = "\n---\n"
+
+# Request bodies are encoded with orjson rather than httpx's stdlib json
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Log messages are sent from one event loop running in a background thread, so
+# emit never has to start a loop of its own and the client below always runs
+# on the same loop
+_BG_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_BG_THREAD_NAME = "telegram-log-sender"
+_bg_loop_lock = threading.Lock()
+
+# Client used to send log messages, kept between sends so each error doesn't
+# open a new connection to Telegram; only used on _BG_LOOP
+_client: Optional[httpx.AsyncClient] = None
+
+# Seconds to wait for queued log messages to be sent at shutdown
+FLUSH_TIMEOUT = 10.0
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the event loop log messages are sent from, starting its thread the
+    first time.
+
+    Returns:
+        asyncio.AbstractEventLoop: The background event loop
+    """
+    global _BG_LOOP
+
+    with _bg_loop_lock:
+        if _BG_LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name=_BG_THREAD_NAME, daemon=True
+            ).start()
+            _BG_LOOP = loop
+
+    return _BG_LOOP
+
+
+def _get_client() -> httpx.AsyncClient:
+    """
+    Get the client for sending log messages, creating it if needed.
+    Must be called from the background loop.
+
+    Returns:
+        httpx.AsyncClient: The shared client
+    """
+    global _client
+
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10),
+        )
+
+    return _client
+
+
+async def _close_client():
+    """Close the client; runs on the background loop."""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def close_log_client():
+    """Close the client used to send log messages."""
+    if _BG_LOOP is None or _client is None:
+        return
+
+    await asyncio.wrap_future(
+        asyncio.run_coroutine_threadsafe(_close_client(), _BG_LOOP)
+    )
 
 
 class TelegramLogHandler(logging.Handler):
     """
     A custom logging handler that sends log messages to a Telegram chat.
     Only sends ERROR level messages and above.
+
+    Records are queued and sent in batches: the first record starts a flush
+    after flush_interval seconds, and everything queued by then goes out in
+    as few messages as fit Telegram's length limit. An error cascade (e.g. a
+    database outage) then sends a few messages instead of one per record.
     """
 
-    def __init__(self, bot_token: str, chat_id: str, level=logging.ERROR):
+    def __init__(
+        self,
+        bot_token: str,
+        chat_id: str,
+        level=logging.ERROR,
+        batch_size: int = 20,
+        flush_interval: float = 2.0,
+        max_queue_size: int = 1000,
+    ):
+        """
+        Args:
+            bot_token: The Telegram bot token to use
+            chat_id: The Telegram chat ID to send messages to
+            level: The minimum log level to send (default: ERROR)
+            batch_size: Maximum number of records sent per flush
+            flush_interval: Seconds to wait for more records before sending
+            max_queue_size: Records queued beyond this are dropped
+        """
         super().__init__(level)
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.hostname = socket.gethostname()
-        self.loop = None
         self.formatter = logging.Formatter(
             "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
         )
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        # Formatted records waiting to be sent, and whether a flush is pending
+        self._pending: Deque[str] = collections.deque()
+        self._pending_lock = threading.Lock()
+        self._flush_scheduled = False
+        self._dropped = 0
 
     def emit(self, record):
         """
-        Send the log record to Telegram.
-        Uses an event loop to handle async operations from a synchronous context.
+        Queue the log record to be sent to Telegram.
+        Does no I/O itself; the first queued record starts a flush on the
+        background loop.
         """
         if record.levelno < self.level:
             return
 
+        # Don't report failures to send to Telegram through Telegram
+        if record.name == _send_logger.name:
+            return
+
         # Get the formatted log message
         msg = self.format(record)
 
@@ -41,40 +163,132 @@ class TelegramLogHandler(logging.Handler):
             exc_text = self.formatter.formatException(record.exc_info)
             msg += "\n\n" + exc_text
 
-        # Enhance with hostname information
-        msg = f"🚨 *Error on {self.hostname}*\n\n```\n{msg}\n```"
+        with self._pending_lock:
+            if len(self._pending) >= self.max_queue_size:
+                self._dropped += 1
+                return
+            self._pending.append(msg)
+            if self._flush_scheduled:
+                return
+            self._flush_scheduled = True
 
-        # Run the async send operation
-        self._send_to_telegram(msg)
+        # Start sending from the background loop
+        self._send_to_telegram()
 
-    def _send_to_telegram(self, message: str):
-        """Call the async function from the synchronous emit method"""
-        # We need to make sure the message gets sent, even in a sync context
-        try:
-            # Try to get the current running loop, if any
-            try:
-                loop = asyncio.get_running_loop()
-                # We're already in a loop, create a task
-                if loop.is_running():
-                    asyncio.create_task(self._async_send(message))
-                    return
-            except RuntimeError:
-                # No loop running, we'll create one
-                pass
-
-            # No existing loop, run in new event loop
-            asyncio.run(self._async_send(message))
+    def _send_to_telegram(self):
+        """Start a flush of the queued records on the background loop"""
+        asyncio.run_coroutine_threadsafe(
+            self._flush(self.flush_interval), _get_background_loop()
+        )
+
+    def flush(self):
+        """
+        Send the queued records now, waiting up to FLUSH_TIMEOUT seconds.
+        Called by logging.shutdown() at exit, so records queued just before
+        the process ends are still sent.
+        """
+        # Nothing to send, or called from the sending thread itself, which
+        # can't wait on its own loop
+        if not self._pending or threading.current_thread().name == _BG_THREAD_NAME:
+            return
 
+        future = asyncio.run_coroutine_threadsafe(
+            self._flush(0), _get_background_loop()
+        )
+        try:
+            future.result(timeout=FLUSH_TIMEOUT)
         except Exception as e:
-            # If anything goes wrong, log it but don't crash
             print(f"Error sending log to Telegram: {str(e)}")
 
+    async def send(self, message: str) -> Dict[str, Any]:
+        """
+        Send a message to the Telegram chat right away, without batching.
+        Can be awaited from any event loop.
+
+        Args:
+            message: The message to send
+
+        Returns:
+            Dict[str, Any]: The Telegram API response
+        """
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(
+                self._async_send(message), _get_background_loop()
+            )
+        )
+
+    def _take_batch(self) -> List[str]:
+        """
+        Remove up to batch_size queued records and return them. When none are
+        left, the pending flush is marked finished in the same step, so a
+        record queued concurrently starts a new flush instead of being missed.
+        """
+        with self._pending_lock:
+            count = min(self.batch_size, len(self._pending))
+            batch = [self._pending.popleft() for _ in range(count)]
+            if self._dropped:
+                batch.append(f"[{self._dropped} more log records were dropped]")
+                self._dropped = 0
+            if not batch:
+                self._flush_scheduled = False
+            return batch
+
+    def _format_batch(self, batch: List[str]) -> List[str]:
+        """
+        Join queued records into as few Telegram messages as fit the length
+        limit, each headed with the hostname.
+
+        Args:
+            batch: The formatted log records
+
+        Returns:
+            List[str]: The messages to send
+        """
+        header = f"🚨 *Error on {self.hostname}*\n\n```\n"
+        footer = "\n```"
+        room = TELEGRAM_LOG_MESSAGE_LIMIT - len(header) - len(footer)
+
+        messages = []
+        chunk: List[str] = []
+        length = 0
+        for msg in batch:
+            added = len(msg) + (len(LOG_BATCH_SEPARATOR) if chunk else 0)
+            if chunk and length + added > room:
+                messages.append(header + LOG_BATCH_SEPARATOR.join(chunk) + footer)
+                chunk, length = [], 0
+                added = len(msg)
+            chunk.append(msg)
+            length += added
+        if chunk:
+            messages.append(header + LOG_BATCH_SEPARATOR.join(chunk) + footer)
+        return messages
+
+    async def _flush(self, delay: float):
+        """
+        Send the queued records once delay seconds have passed, until none
+        are left.
+
+        Args:
+            delay: Seconds to wait for more records first
+        """
+        try:
+            if delay:
+                await asyncio.sleep(delay)
+            while batch := self._take_batch():
+                for message in self._format_batch(batch):
+                    await self._async_send(message)
+        except BaseException:
+            # Let the next record start a new flush for whatever is left
+            with self._pending_lock:
+                self._flush_scheduled = False
+            raise
+
     async def _async_send(self, message: str) -> Dict[str, Any]:
         """Asynchronously send a message to the Telegram chat."""
         url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
 
         # Ensure message is not too long for Telegram (max 4096 chars)
-        if len(message) > 4000:
+        if len(message) > TELEGRAM_LOG_MESSAGE_LIMIT:
             message = message[:3900] + "...\n[message truncated due to length]"
 
         payload = {
@@ -85,38 +299,41 @@ class TelegramLogHandler(logging.Handler):
         }
 
         try:
-            # Set a timeout for the request
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, json=payload)
+            client = _get_client()
+            response = await client.post(
+                url, content=orjson.dumps(payload), headers=_JSON_HEADERS
+            )
 
             if response.status_code != 200:
                 print(f"Failed to send log to Telegram: {response.text}")
-                logger.error(f"Failed to send log to Telegram: {response.text}")
+                _send_logger.error(f"Failed to send log to Telegram: {response.text}")
 
                 # If parse_mode causes an issue, try without it
                 if "parse mode" in response.text.lower():
                     print("Retrying without Markdown parsing...")
                     payload["parse_mode"] = None
-                    async with httpx.AsyncClient(timeout=10.0) as client:
-                        response = await client.post(url, json=payload)
+                    response = await client.post(
+                        url, content=orjson.dumps(payload), headers=_JSON_HEADERS
+                    )
 
                     if response.status_code == 200:
                         print("Successfully sent message without Markdown parsing")
-                        return response.json()
+                        return orjson.loads(response.content)
             else:
-                return response.json()
+                return orjson.loads(response.content)
 
         except Exception as e:
             error_msg = f"Error sending log to Telegram: {str(e)}"
             print(error_msg)
-            logger.error(error_msg)
+            _send_logger.error(error_msg)
 
             # Try one more time without markdown parsing
             try:
                 payload["parse_mode"] = None
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.post(url, json=payload)
-                return response.json()
+                response = await _get_client().post(
+                    url, content=orjson.dumps(payload), headers=_JSON_HEADERS
+                )
+                return orjson.loads(response.content)
             except Exception as e2:
                 print(f"Second attempt failed: {str(e2)}")
 
@@ -134,7 +351,23 @@ def setup_telegram_logger(
         chat_id: The Telegram chat ID to send messages to
         level: The minimum log level to send (default: ERROR)
         test: Whether to send a test message (default: False)
+
+    Returns:
+        TelegramLogHandler: The handler added to the root logger
     """
+    root_logger = logging.getLogger()
+
+    # Reuse the handler if it's already installed (e.g. common was reloaded),
+    # so each error isn't sent to Telegram more than once
+    for existing in root_logger.handlers:
+        if (
+            isinstance(existing, TelegramLogHandler)
+            and existing.bot_token == bot_token
+            and existing.chat_id == chat_id
+        ):
+            existing.setLevel(level)
+            return existing
+
     # Create the handler
     handler = TelegramLogHandler(bot_token, chat_id, level)
 
@@ -145,7 +378,6 @@ def setup_telegram_logger(
     handler.setFormatter(formatter)
 
     # Add the handler to the root logger
-    root_logger = logging.getLogger()
     root_logger.addHandler(handler)
 
     # Log info message
@@ -155,3 +387,5 @@ def setup_telegram_logger(
     if test:
         logger.error("This is a test error message from the Telegram logger setup")
         logger.info("A test error message was sent to Telegram")
+
+    return handler
@@ -1,5 +1,4 @@
 import sys
-import uvicorn
 
 
 def print_usage():
@@ -44,25 +43,26 @@ if __name__ == "__main__":
     # Check if a mode is specified
     if len(sys.argv) < 2:
         # No mode specified, default to server
-        from server import app
+        from server import run_server
 
-        uvicorn.run(app, host="0.0.0.0", port=8000)
+        run_server()
     else:
         mode = sys.argv[1].lower()
 
         if mode == "server":
             # Server mode
-            from server import app
+            from server import run_server
 
-            uvicorn.run(app, host="0.0.0.0", port=8000)
+            run_server()
 
         elif mode == "cli":
             # CLI mode - remove the mode argument for the CLI script
             sys.argv.pop(1)
             from cli import main_cli
-            import asyncio
+            import uvloop
 
-            asyncio.run(main_cli())
+            # Run on uvloop, as the server does
+            uvloop.run(main_cli())
 
         else:
             # Unknown mode
@@ -1,14 +1,16 @@
+import asyncio
 from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, Request
-from typing import Dict, Any
-import json
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+import logging
+import orjson
 import uvicorn
-import datetime
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from common import logger
-from tweet import Tweet, format_tweet_for_telegram
+from common import _LATEST_DATE, logger
+from tweet import Tweet, format_tweet_for_telegram, parse_twitter_date
 from telegram import send_telegram_message
 from translate import translate, TranslationError
 import config
@@ -17,6 +19,13 @@ from db import (
     close_connection_pool,
     get_telegram_message_id_for_tweet,
 )
+from http_client import close_http_client
+from logging_handlers import close_log_client
+
+# Tweets from one webhook are translated concurrently; this bounds how many
+# translation requests are in flight at once, to stay under the LLM rate limits
+WEBHOOK_TRANSLATION_CONCURRENCY = 5
+_translation_semaphore = asyncio.Semaphore(WEBHOOK_TRANSLATION_CONCURRENCY)
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
@@ -49,14 +58,20 @@ async def lifespan(_: FastAPI):
 
     yield
 
-    """Close the database connection pool on shutdown."""
+    """Close the database connection pool and HTTP client on shutdown."""
     logger.info("Closing database connection pool...")
     await close_connection_pool()
     logger.info("Database connection pool closed")
+    await close_http_client()
+    await close_log_client()
 
 
 # Create FastAPI app instance
-app = FastAPI(title="Twitter to Telegram Forwarder", lifespan=lifespan)
+app = FastAPI(
+    title="Twitter to Telegram Forwarder",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # Middleware to handle the x-envoy-external-address header
 @app.middleware("http")
@@ -82,8 +97,235 @@ async def envoy_external_address_middleware(request: Request, call_next):
 
     return await call_next(request)
 
+
+def _group_reply_chains(tweets_list: List[Any]) -> List[List[Tuple[int, Any]]]:
+    """
+    Group tweets into reply chains: a reply joins its parent's chain when the
+    parent is in the same payload, and every other tweet starts its own chain.
+
+    Args:
+        tweets_list: The tweets from the webhook payload, oldest first
+
+    Returns:
+        List[List[Tuple[int, Any]]]: The chains, each a list of (index, tweet)
+        pairs in their original order
+    """
+    parents = {
+        tweet_data["id"]: tweet_data.get("inReplyToId")
+        for tweet_data in tweets_list
+        if isinstance(tweet_data, dict) and tweet_data.get("id")
+    }
+
+    chains: Dict[Any, List[Tuple[int, Any]]] = {}
+    for i, tweet_data in enumerate(tweets_list):
+        if not isinstance(tweet_data, dict) or not tweet_data.get("id"):
+            chains[("index", i)] = [(i, tweet_data)]
+            continue
+
+        # Walk up to the oldest ancestor in this payload
+        root = tweet_data["id"]
+        seen = {root}
+        while parents.get(root) in parents and parents[root] not in seen:
+            root = parents[root]
+            seen.add(root)
+        chains.setdefault(root, []).append((i, tweet_data))
+
+    return list(chains.values())
+
+
+async def _process_tweet(i: int, tweet_data: Any) -> Optional[Dict[str, Any]]:
+    """
+    Translate a tweet from the webhook payload and forward it to Telegram.
+
+    Args:
+        i: Index of the tweet in the payload
+        tweet_data: The tweet as received
+
+    Returns:
+        Optional[Dict[str, Any]]: The result reported for the tweet, or None
+        if it was skipped
+    """
+    if not isinstance(tweet_data, dict):
+        logger.warning(f"Tweet {i+1} is not a dictionary, skipping")
+        return None
+
+    # Log the keys in this tweet object
+    logger.debug("Tweet %d keys: %s", i + 1, list(tweet_data.keys()))
+
+    try:
+        # Validate the tweet: the webhook body is unauthenticated, so e.g. a
+        # numeric id is rejected here instead of failing after it was sent
+        tweet = Tweet.model_validate(tweet_data)
+        logger.info(f"Tweet {i+1} text: {tweet.text or 'No text available'}")
+
+        # Extract author information for matching with character
+        if tweet.author and tweet.author.userName:
+            author_username = tweet.author.userName.lower()
+            logger.info(f"Author: {tweet.author.name} (@{author_username})")
+
+            # Find the matching character for the tweet (None if there is none)
+            character = config.characters.get(author_username)
+            if character is None:
+                logger.warning(f"No matching character found for @{author_username}")
+                return {
+                    "id": tweet.id,
+                    "forwarded": False,
+                    "reason": "No matching character found",
+                }
+            logger.info(f"Found matching character: {character.name}")
+
+            # Always translate the tweet
+            original_text = tweet.text or ""
+            translated_text = None
+
+            if original_text:
+                try:
+                    logger.info("Translating tweet to Korean...")
+                    async with _translation_semaphore:
+                        translated_text = await translate(original_text)
+                    logger.info("Translation successful")
+                except TranslationError as e:
+                    logger.error(f"Translation error: {str(e)}")
+                except Exception as e:
+                    logger.error(
+                        f"Unexpected error during translation: {str(e)}"
+                    )
+
+            # Check if this is a reply to another tweet
+            reply_to_message_id = None
+            if tweet.inReplyToId:
+                logger.info(
+                    f"Tweet {tweet.id} is a reply to tweet {tweet.inReplyToId}"
+                )
+                # Try to find the Telegram message ID for the parent tweet
+                try:
+                    parent_telegram_message_id = (
+                        await get_telegram_message_id_for_tweet(
+                            tweet.inReplyToId
+                        )
+                    )
+                    if parent_telegram_message_id:
+                        logger.info(
+                            f"Found parent Telegram message ID: {parent_telegram_message_id}"
+                        )
+                        reply_to_message_id = parent_telegram_message_id
+                    else:
+                        logger.info(
+                            f"No Telegram message found for parent tweet {tweet.inReplyToId}"
+                        )
+                except Exception as e:
+                    logger.error(f"Error looking up parent tweet: {str(e)}")
+
+            # Get the tweet URL (original or constructed)
+            tweet_url = (
+                tweet.twitterUrl
+                or tweet.url
+                or f"https://twitter.com/{author_username}/status/{tweet.id}"
+            )
+
+            # Format and forward the tweet (translated if available)
+            try:
+                if translated_text:
+                    # Show the translated text without copying the tweet
+                    formatted_message = format_tweet_for_telegram(
+                        tweet, override_text=translated_text
+                    )
+
+                    # Send message with full context for database storage
+                    await send_telegram_message(
+                        as_character=character,
+                        message=formatted_message,
+                        tweet_id=tweet.id,
+                        tweet_url=tweet_url,
+                        original_text=original_text,
+                        translated_text=translated_text,
+                        parent_tweet_id=tweet.inReplyToId,
+                        llm_provider=(
+                            config.common.TRANSLATION_MODELS[0]
+                            if config.common.TRANSLATION_MODELS
+                            else None
+                        ),
+                        reply_to_message_id=reply_to_message_id,
+                    )
+
+                    logger.info(
+                        f"Successfully forwarded translated tweet {tweet.id} as {character.name}"
+                    )
+                    return {
+                        "id": tweet.id,
+                        "forwarded": True,
+                        "character": character.name,
+                        "translated": True,
+                        "is_reply": bool(reply_to_message_id),
+                    }
+                else:
+                    # Fall back to original if translation failed
+                    formatted_message = format_tweet_for_telegram(tweet)
+
+                    # Send message with full context for database storage
+                    await send_telegram_message(
+                        as_character=character,
+                        message=formatted_message,
+                        tweet_id=tweet.id,
+                        tweet_url=tweet_url,
+                        original_text=original_text,
+                        translated_text=original_text,  # Use original as translation failed
+                        parent_tweet_id=tweet.inReplyToId,
+                        reply_to_message_id=reply_to_message_id,
+                    )
+
+                    logger.info(
+                        f"Successfully forwarded original tweet {tweet.id} as {character.name} (translation failed)"
+                    )
+                    return {
+                        "id": tweet.id,
+                        "forwarded": True,
+                        "character": character.name,
+                        "translated": False,
+                        "is_reply": bool(reply_to_message_id),
+                    }
+            except Exception as e:
+                # Error and user notification are already handled in send_telegram_message
+                logger.error(f"Error sending tweet to Telegram: {str(e)}")
+                return {
+                    "id": tweet.id,
+                    "forwarded": False,
+                    "character": character.name,
+                    "error": "Message delivery failed",
+                }
+        else:
+            logger.warning(f"Tweet {i+1} has no author or username")
+            return {
+                "id": tweet.id if tweet.id else f"unknown-{i}",
+                "forwarded": False,
+                "reason": "Missing author information",
+            }
+
+    except Exception as e:
+        logger.error(f"Error processing tweet {i+1}: {str(e)}")
+        return {"error": str(e)}
+
+
+async def _process_reply_chain(
+    chain: List[Tuple[int, Any]],
+) -> List[Tuple[int, Optional[Dict[str, Any]]]]:
+    """
+    Process the tweets of one reply chain in order.
+
+    Args:
+        chain: (index, tweet) pairs from _group_reply_chains
+
+    Returns:
+        List[Tuple[int, Optional[Dict[str, Any]]]]: (index, result) pairs
+    """
+    results = []
+    for i, tweet_data in chain:
+        results.append((i, await _process_tweet(i, tweet_data)))
+    return results
+
+
 @app.post("/webhook", status_code=200)
-async def receive_webhook(payload: Dict[str, Any], request: Request):
+async def receive_webhook(request: Request):
     """
     Webhook endpoint to receive Twitter events and forward them to Telegram.
     """
@@ -91,34 +333,47 @@ async def receive_webhook(payload: Dict[str, Any], request: Request):
     client_ip = request.headers.get("x-envoy-external-address", request.client.host)
     logger.info("Received webhook payload")
 
-    # Log the full payload for debugging
-    logger.info(f"Full payload JSON: {json.dumps(payload, indent=2)}")
+    # Decode the raw body ourselves instead of having FastAPI validate it
+    # into a Dict[str, Any] on every request
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        logger.warning("Webhook body is not valid JSON")
+        raise HTTPException(status_code=422, detail="Invalid JSON payload")
 
-    # Log root level keys to understand structure
-    logger.info(f"Payload keys at root level: {list(payload.keys())}")
+    if not isinstance(payload, dict):
+        logger.warning("Webhook body is not a JSON object")
+        raise HTTPException(status_code=422, detail="Payload must be a JSON object")
 
-    # Check if this is a test webhook event
+    # Answer test webhook events right away; they carry no tweets
     if payload.get("event_type") == "test_webhook_url":
         logger.info("Received test webhook verification event")
         return {"status": "success", "message": "Test webhook received successfully"}
 
-    # Check for tweets array directly in the payload
-    tweets_list = []
-
-    # Try to locate tweets in the payload
-    if "tweets" in payload and isinstance(payload["tweets"], list):
-        tweets_list = payload["tweets"]
-        logger.info(f"Found {len(tweets_list)} tweets in 'tweets' field")
+    # Log the full payload for debugging (only pretty-print when DEBUG is on)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Full payload JSON: %s",
+            orjson.dumps(payload, option=orjson.OPT_INDENT_2).decode(),
+        )
 
-    # If no tweets found, look in other common locations
-    if not tweets_list:
-        for field in ["data", "statuses", "results"]:
-            if field in payload and isinstance(payload[field], list):
-                tweets_list = payload[field]
-                logger.info(
-                    f"Found {len(tweets_list)} potential tweets in '{field}' field"
-                )
-                break
+    # Log root level keys to understand structure
+    logger.debug("Payload keys at root level: %s", list(payload.keys()))
+
+    # Tweets normally come in the 'tweets' field
+    tweets_list = payload.get("tweets")
+    if isinstance(tweets_list, list) and tweets_list:
+        logger.info("Found %d tweets in 'tweets' field", len(tweets_list))
+    else:
+        # If no tweets found, look in other common locations
+        tweets_list = next(
+            (
+                payload[field]
+                for field in ("data", "statuses", "results")
+                if isinstance(payload.get(field), list)
+            ),
+            [],
+        )
 
     # If still no tweets, check if the payload itself is a tweet or array of tweets
     if not tweets_list and "id" in payload and "text" in payload:
@@ -134,217 +389,49 @@ async def receive_webhook(payload: Dict[str, Any], request: Request):
     try:
         logger.info("Sorting tweets by date (oldest first)...")
 
-        # Create temporary list with (tweet, date) tuples for sorting
-        dated_tweets = []
+        # Sort key for each tweet: its date, with undated tweets at the end
+        dates = []
         for tweet_data in tweets_list:
-            if not isinstance(tweet_data, dict):
-                # Skip non-dictionary entries
-                dated_tweets.append((tweet_data, None))
-                continue
-
             parsed_date = None
-            # Try to get parsed date from tweet
-            if "parsed_date" in tweet_data:
-                parsed_date = tweet_data["parsed_date"]
-            # Otherwise try to parse from createdAt
-            elif "createdAt" in tweet_data:
-                try:
-                    parsed_date = datetime.datetime.strptime(
-                        tweet_data["createdAt"], "%a %b %d %H:%M:%S %z %Y"
-                    )
-                except (ValueError, TypeError):
-                    # If parsing fails, use None (will end up at the end)
-                    pass
-            dated_tweets.append((tweet_data, parsed_date))
-
-        # Sort by date, with None dates at the end
-        # The tuple sort key: (is_none, date_value) ensures None values go last
-        sorted_tweets = [
-            t[0] for t in sorted(dated_tweets, key=lambda x: (x[1] is None, x[1]))
-        ]
-        tweets_list = sorted_tweets
+            if isinstance(tweet_data, dict):
+                # Try to get parsed date from tweet
+                parsed_date = tweet_data.get("parsed_date")
+                # Otherwise try to parse from createdAt
+                if parsed_date is None and "createdAt" in tweet_data:
+                    # (None if parsing fails, which puts it at the end)
+                    parsed_date = parse_twitter_date(tweet_data["createdAt"])
+                    # Keep it so the Tweet validator doesn't parse it again
+                    tweet_data["parsed_date"] = parsed_date
+            dates.append(_LATEST_DATE if parsed_date is None else parsed_date)
+
+        # Payloads usually arrive in order already; only sort if they don't
+        if any(later < earlier for earlier, later in zip(dates, dates[1:])):
+            order = sorted(range(len(tweets_list)), key=dates.__getitem__)
+            tweets_list = [tweets_list[j] for j in order]
+
         logger.info(f"Sorted {len(tweets_list)} tweets by date (oldest first)")
     except Exception as e:
         logger.warning(f"Failed to sort tweets by date: {str(e)}")
         logger.warning("Will process tweets in their original order")
 
-    # Process each tweet
-    processed_tweets = []
-
-    for i, tweet_data in enumerate(tweets_list):
-        if not isinstance(tweet_data, dict):
-            logger.warning(f"Tweet {i+1} is not a dictionary, skipping")
-            continue
-
-        # Log the keys in this tweet object
-        logger.info(f"Tweet {i+1} keys: {list(tweet_data.keys())}")
-
-        try:
-            # Parse the tweet data
-            tweet = Tweet.parse_obj(tweet_data)
-            logger.info(f"Tweet {i+1} text: {tweet.text or 'No text available'}")
-
-            # Extract author information for matching with character
-            if tweet.author and tweet.author.userName:
-                author_username = tweet.author.userName.lower()
-                logger.info(f"Author: {tweet.author.name} (@{author_username})")
-
-                # Try to find matching character for the tweet
-                try:
-                    character = config.characters[author_username]
-                    logger.info(f"Found matching character: {character.name}")
-
-                    # Always translate the tweet
-                    original_text = tweet.text or ""
-                    translated_text = None
-
-                    if original_text:
-                        try:
-                            logger.info("Translating tweet to Korean...")
-                            translated_text = await translate(original_text)
-                            logger.info("Translation successful")
-                        except TranslationError as e:
-                            logger.error(f"Translation error: {str(e)}")
-                        except Exception as e:
-                            logger.error(
-                                f"Unexpected error during translation: {str(e)}"
-                            )
-
-                    # Check if this is a reply to another tweet
-                    reply_to_message_id = None
-                    if tweet.inReplyToId:
-                        logger.info(
-                            f"Tweet {tweet.id} is a reply to tweet {tweet.inReplyToId}"
-                        )
-                        # Try to find the Telegram message ID for the parent tweet
-                        try:
-                            parent_telegram_message_id = (
-                                await get_telegram_message_id_for_tweet(
-                                    tweet.inReplyToId
-                                )
-                            )
-                            if parent_telegram_message_id:
-                                logger.info(
-                                    f"Found parent Telegram message ID: {parent_telegram_message_id}"
-                                )
-                                reply_to_message_id = parent_telegram_message_id
-                            else:
-                                logger.info(
-                                    f"No Telegram message found for parent tweet {tweet.inReplyToId}"
-                                )
-                        except Exception as e:
-                            logger.error(f"Error looking up parent tweet: {str(e)}")
-
-                    # Get the tweet URL (original or constructed)
-                    tweet_url = (
-                        tweet.twitterUrl
-                        or tweet.url
-                        or f"https://twitter.com/{author_username}/status/{tweet.id}"
-                    )
-
-                    # Format and forward the tweet (translated if available)
-                    try:
-                        if translated_text:
-                            # Create a copy of the tweet with translated text
-                            tweet_dict = tweet.dict()
-                            tweet_dict["text"] = translated_text
-                            translated_tweet = Tweet.parse_obj(tweet_dict)
-                            formatted_message = format_tweet_for_telegram(
-                                translated_tweet
-                            )
-
-                            # Send message with full context for database storage
-                            await send_telegram_message(
-                                as_character=character,
-                                message=formatted_message,
-                                tweet_id=tweet.id,
-                                tweet_url=tweet_url,
-                                original_text=original_text,
-                                translated_text=translated_text,
-                                parent_tweet_id=tweet.inReplyToId,
-                                llm_provider=(
-                                    config.common.TRANSLATION_MODELS[0]
-                                    if config.common.TRANSLATION_MODELS
-                                    else None
-                                ),
-                                reply_to_message_id=reply_to_message_id,
-                            )
-
-                            processed_tweets.append(
-                                {
-                                    "id": tweet.id,
-                                    "forwarded": True,
-                                    "character": character.name,
-                                    "translated": True,
-                                    "is_reply": bool(reply_to_message_id),
-                                }
-                            )
-                            logger.info(
-                                f"Successfully forwarded translated tweet {tweet.id} as {character.name}"
-                            )
-                        else:
-                            # Fall back to original if translation failed
-                            formatted_message = format_tweet_for_telegram(tweet)
-
-                            # Send message with full context for database storage
-                            await send_telegram_message(
-                                as_character=character,
-                                message=formatted_message,
-                                tweet_id=tweet.id,
-                                tweet_url=tweet_url,
-                                original_text=original_text,
-                                translated_text=original_text,  # Use original as translation failed
-                                parent_tweet_id=tweet.inReplyToId,
-                                reply_to_message_id=reply_to_message_id,
-                            )
-
-                            processed_tweets.append(
-                                {
-                                    "id": tweet.id,
-                                    "forwarded": True,
-                                    "character": character.name,
-                                    "translated": False,
-                                    "is_reply": bool(reply_to_message_id),
-                                }
-                            )
-                            logger.info(
-                                f"Successfully forwarded original tweet {tweet.id} as {character.name} (translation failed)"
-                            )
-                    except Exception as e:
-                        # Error and user notification are already handled in send_telegram_message
-                        logger.error(f"Error sending tweet to Telegram: {str(e)}")
-                        processed_tweets.append(
-                            {
-                                "id": tweet.id,
-                                "forwarded": False,
-                                "character": character.name,
-                                "error": "Message delivery failed",
-                            }
-                        )
-                except (KeyError, AttributeError):
-                    logger.warning(
-                        f"No matching character found for @{author_username}"
-                    )
-                    processed_tweets.append(
-                        {
-                            "id": tweet.id,
-                            "forwarded": False,
-                            "reason": "No matching character found",
-                        }
-                    )
-            else:
-                logger.warning(f"Tweet {i+1} has no author or username")
-                processed_tweets.append(
-                    {
-                        "id": tweet.id if tweet.id else f"unknown-{i}",
-                        "forwarded": False,
-                        "reason": "Missing author information",
-                    }
-                )
+    # Tweets in different reply chains are independent, so process the chains
+    # concurrently; tweets within a chain stay in order so a reply can find its
+    # parent's Telegram message
+    chain_results = await asyncio.gather(
+        *(_process_reply_chain(chain) for chain in _group_reply_chains(tweets_list)),
+        return_exceptions=True,
+    )
 
-        except Exception as e:
-            logger.error(f"Error processing tweet {i+1}: {str(e)}")
-            processed_tweets.append({"error": str(e)})
+    # Report results in the order the tweets were processed
+    results = []
+    for chain_result in chain_results:
+        if isinstance(chain_result, BaseException):
+            logger.error(f"Error processing reply chain: {str(chain_result)}")
+            results.append((len(tweets_list), {"error": str(chain_result)}))
+        else:
+            results.extend(chain_result)
+    results.sort(key=lambda r: r[0])
+    processed_tweets = [result for _, result in results if result is not None]
 
     return {
         "status": "success",
@@ -398,12 +485,54 @@ async def health_check(request: Request):
     return response
 
 
-if __name__ == "__main__":
-    # Run the FastAPI app with proxy headers support
+async def _check_database() -> bool:
+    """
+    Check that the database is reachable and its schema is up to date.
+    Closes the connection pool afterwards, so none is carried into workers.
+
+    Returns:
+        bool: True if the server can start, False otherwise
+    """
+    from db import check_db_connection, check_schema_version
+
+    try:
+        db_healthy, db_error = await check_db_connection()
+        if not db_healthy:
+            logger.error(f"Failed to connect to database: {db_error}")
+            return False
+
+        if not await check_schema_version():
+            logger.error("Database schema version mismatch")
+            logger.error("Please run migrations manually with: python src/cli.py migrate-db")
+            return False
+
+        return True
+    finally:
+        await close_connection_pool()
+
+
+def run_server():
+    """Run the webhook server with one worker process per WEB_CONCURRENCY."""
+    # Check the database before starting any workers: a worker that exits
+    # during startup is restarted by Uvicorn's supervisor, so a bad deploy
+    # would never exit on its own
+    if not asyncio.run(_check_database()):
+        import sys
+        logger.error("Database initialization failed - shutting down server")
+        sys.exit(1)
+
     uvicorn.run(
-        app,
+        # Workers re-import the app, so it has to be given as an import string
+        "server:app",
         host="0.0.0.0",
         port=8000,
+        workers=config.common.WEB_CONCURRENCY,
+        loop="uvloop",
+        http="httptools",
         proxy_headers=True,  # Enable proxy headers handling
         forwarded_allow_ips="*",  # Trust X-Forwarded-* headers from all IPs
     )
+
+
+if __name__ == "__main__":
+    run_server()
@@ -1,12 +1,16 @@
-import httpx
 import logging
 from typing import Dict, Any, Optional
+import orjson
 import config
+from http_client import get_http_client
 from db import store_translated_message, get_telegram_message_id_for_tweet
 
 # Configure module-specific logger
 logger = logging.getLogger(__name__)
 
+# Request bodies are encoded with orjson rather than httpx's stdlib json
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
 
 # Helper function to send message to Telegram
 async def send_telegram_message(
@@ -19,6 +23,7 @@ async def send_telegram_message(
     parent_tweet_id: Optional[str] = None,
     llm_provider: Optional[str] = None,
     reply_to_message_id: Optional[int] = None,
+    notify_on_error: bool = True,
 ) -> Dict[str, Any]:
     """
     Send a message to the Telegram chat and store it in the database.
@@ -33,12 +38,12 @@ async def send_telegram_message(
         parent_tweet_id: The ID of the parent tweet if this is a reply
         llm_provider: The LLM provider used for translation
         reply_to_message_id: Telegram message ID to reply to
+        notify_on_error: Whether to post the error notice to the chat if
+            sending fails (off when the caller will retry the message)
 
     Returns:
         Dict[str, Any]: The Telegram API response
     """
-    url = f"https://api.telegram.org/bot{as_character.telegram_bot_token}/sendMessage"
-
     payload = {
         "chat_id": config.common.TELEGRAM_CHAT_ID,
         "text": message,
@@ -52,21 +57,25 @@ async def send_telegram_message(
 
     try:
         # Send the message to Telegram
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload)
+        response = await get_http_client().post(
+            as_character.send_message_url,
+            content=orjson.dumps(payload),
+            headers=_JSON_HEADERS,
+        )
 
         if response.status_code != 200:
             logger.error(f"Failed to send message to Telegram: {response.text}")
             from fastapi import HTTPException
 
             # Send user-facing error notification
-            await send_error_notification()
+            if notify_on_error:
+                await send_error_notification()
             raise HTTPException(
                 status_code=500, detail="Failed to send message to Telegram"
             )
 
         # Parse the response
-        response_data = response.json()
+        response_data = orjson.loads(response.content)
 
         # Store the message in the database if we have tweet information
         if tweet_id and tweet_url and original_text and translated_text:
@@ -100,7 +109,8 @@ async def send_telegram_message(
     except Exception as e:
         logger.error(f"Exception sending message to Telegram: {str(e)}")
         # Send user-facing error notification
-        await send_error_notification()
+        if notify_on_error:
+            await send_error_notification()
         from fastapi import HTTPException
 
         raise HTTPException(
@@ -117,7 +127,7 @@ async def send_error_notification() -> Optional[Dict[str, Any]]:
         )
 
         # Send the error notification
-        url = f"https://api.telegram.org/bot{config.characters.mai.telegram_bot_token}/sendMessage"
+        url = config.characters.mai.send_message_url
 
         payload = {
             "chat_id": config.common.TELEGRAM_CHAT_ID,
@@ -126,15 +136,16 @@ async def send_error_notification() -> Optional[Dict[str, Any]]:
             "disable_web_page_preview": True,
         }
 
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.post(url, json=payload)
+        response = await get_http_client().post(
+            url, content=orjson.dumps(payload), headers=_JSON_HEADERS, timeout=5.0
+        )
 
         if response.status_code != 200:
             logger.error(f"Failed to send error notification: {response.text}")
             return None
 
         logger.info("User-facing error notification sent successfully")
-        return response.json()
+        return orjson.loads(response.content)
 
     except Exception as e:
         # If error notification itself fails, just log it but don't retry or raise
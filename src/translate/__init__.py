@@ -5,45 +5,37 @@ Supports multiple LLM providers with fallback and retry logic.
 """
 
 import os
+import importlib.util
 import logging
 from typing import Dict, Any, Optional, List, Tuple, Protocol, Union
 import asyncio
 import random
+from collections import OrderedDict
 from abc import ABC, abstractmethod
 
-# Import for Anthropic provider
-try:
-    from anthropic import AsyncAnthropic, RateLimitError as AnthropicRateLimitError
-    from anthropic import (
-        APIStatusError as AnthropicAPIStatusError,
-        APIError as AnthropicAPIError,
-    )
-    from anthropic.types import MessageParam
-
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
-
-# Import for OpenAI provider
-try:
-    from openai import AsyncOpenAI
-    from openai.types.chat import ChatCompletionMessageParam
-    from openai import RateLimitError as OpenAIRateLimitError
-    from openai import (
-        APIStatusError as OpenAIAPIStatusError,
-        APIError as OpenAIAPIError,
-    )
-
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-
 import config
+from http_client import get_http_client
+
+# Provider SDKs are slow to import, so only check that they are installed here;
+# each provider imports its SDK the first time it translates
+ANTHROPIC_AVAILABLE = importlib.util.find_spec("anthropic") is not None
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+# Recent translations by (text, models, API key), least recently used first
+_TRANSLATION_CACHE_SIZE = 2048
+_translation_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+# Translations in progress, so concurrent requests for the same text share one
+_translations_in_flight: Dict[Tuple, "asyncio.Task[str]"] = {}
+
+# Seconds to wait for an LLM response (the SDKs' own default). The SDKs run on
+# the shared HTTP client, whose 10 second timeout would otherwise apply
+TRANSLATION_REQUEST_TIMEOUT = 600.0
+
+
 class TranslationError(Exception):
     """Exception raised for errors during translation."""
 
@@ -119,8 +111,12 @@ class AnthropicProvider(LLMProvider):
                 "Anthropic package is not installed. Install with 'pip install anthropic'."
             )
 
-        # Create Anthropic client
-        client = AsyncAnthropic(api_key=self.api_key)
+        from anthropic import AsyncAnthropic, RateLimitError as AnthropicRateLimitError
+        from anthropic import APIStatusError as AnthropicAPIStatusError
+        from anthropic.types import MessageParam
+
+        # Create Anthropic client on the shared HTTP connection pool
+        client = AsyncAnthropic(api_key=self.api_key, http_client=get_http_client())
 
         # Fill in the template with the text to translate
         prompt = prompt_template.replace("{{TEXT}}", text)
@@ -139,6 +135,7 @@ class AnthropicProvider(LLMProvider):
                     model=self.model_name,
                     max_tokens=1024,
                     messages=[MessageParam(role="user", content=prompt)],
+                    timeout=TRANSLATION_REQUEST_TIMEOUT,
                 )
 
                 # Extract the translated text from the response
@@ -236,8 +233,12 @@ class OpenAIProvider(LLMProvider):
                 "OpenAI package is not installed. Install with 'pip install openai'."
             )
 
-        # Create OpenAI client
-        client = AsyncOpenAI(api_key=self.api_key)
+        from openai import AsyncOpenAI
+        from openai import RateLimitError as OpenAIRateLimitError
+        from openai import APIStatusError as OpenAIAPIStatusError
+
+        # Create OpenAI client on the shared HTTP connection pool
+        client = AsyncOpenAI(api_key=self.api_key, http_client=get_http_client())
 
         # Fill in the template with the text to translate
         prompt = prompt_template.replace("{{TEXT}}", text)
@@ -254,6 +255,7 @@ class OpenAIProvider(LLMProvider):
                     model=self.model_name,
                     max_completion_tokens=1024,
                     messages=[{"role": "user", "content": prompt}],
+                    timeout=TRANSLATION_REQUEST_TIMEOUT,
                 )
 
                 # Extract the translated text from the response
@@ -343,6 +345,64 @@ async def translate(
         # Use the configured models list
         models_to_try = config.common.TRANSLATION_MODELS
 
+    # Reuse a recent translation of the same text, or wait for one in progress
+    key = (text, tuple(models_to_try), api_key)
+    cached = _translation_cache.get(key)
+    if cached is not None:
+        _translation_cache.move_to_end(key)
+        return cached
+
+    loop = asyncio.get_running_loop()
+    in_flight = _translations_in_flight.get(key)
+    if in_flight is None or in_flight.get_loop() is not loop:
+        in_flight = loop.create_task(
+            _translate_uncached(
+                text, models_to_try, api_key, max_retries, initial_backoff
+            )
+        )
+        _translations_in_flight[key] = in_flight
+        in_flight.add_done_callback(lambda task: _finish_translation(key, task))
+
+    # Shield the shared task so one caller being cancelled doesn't cancel it
+    # for the others
+    return await asyncio.shield(in_flight)
+
+
+def _finish_translation(key: Tuple, task: "asyncio.Task[str]") -> None:
+    """Cache a finished translation (unless it failed) and drop it from in-flight."""
+    if _translations_in_flight.get(key) is task:
+        del _translations_in_flight[key]
+    if task.cancelled() or task.exception() is not None:
+        return
+
+    _translation_cache[key] = task.result()
+    if len(_translation_cache) > _TRANSLATION_CACHE_SIZE:
+        _translation_cache.popitem(last=False)
+
+
+async def _translate_uncached(
+    text: str,
+    models_to_try: List[str],
+    api_key: Optional[str],
+    max_retries: int,
+    initial_backoff: float,
+) -> str:
+    """
+    Translate text with the first model in models_to_try that succeeds.
+
+    Args:
+        text: The Japanese text to translate
+        models_to_try: Model specifications ("provider:model") in order
+        api_key: Anthropic API key override, if any
+        max_retries: Maximum number of retry attempts for rate limit errors
+        initial_backoff: Initial backoff time in seconds
+
+    Returns:
+        The translated Korean text
+
+    Raises:
+        TranslationError: If every model fails
+    """
     # Load translation prompt
     try:
         prompt_path = os.path.join(
@@ -431,3 +491,41 @@ async def translate(
     error_message = "All translation providers failed: " + "; ".join(errors)
     logger.error(error_message)
     raise TranslationError(error_message)
+
+
+async def translate_batch(
+    texts: List[str],
+    max_concurrency: int = 8,
+    return_exceptions: bool = False,
+) -> List[Union[str, Exception]]:
+    """
+    Translate several texts, running up to max_concurrency translations at once.
+    Identical texts are translated only once.
+
+    Args:
+        texts: The Japanese texts to translate
+        max_concurrency: Maximum number of translation requests in flight
+        return_exceptions: If True, a failed translation is returned in place of
+            its result instead of being raised
+
+    Returns:
+        The translated Korean texts, in the same order as texts
+
+    Raises:
+        TranslationError: If a translation fails and return_exceptions is False
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def translate_one(text: str) -> str:
+        async with semaphore:
+            return await translate(text)
+
+    # Translate each distinct text once
+    unique_texts = list(dict.fromkeys(texts))
+    results = await asyncio.gather(
+        *(translate_one(text) for text in unique_texts),
+        return_exceptions=return_exceptions,
+    )
+    translations = dict(zip(unique_texts, results))
+
+    return [translations[text] for text in texts]
@@ -1,15 +1,91 @@
-from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, validator
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 import datetime
-import httpx
+import functools
 import os
 import logging
+import orjson
 import config
+from http_client import get_http_client, AsyncRateLimiter
 
 
 # Configure module-specific logger
 logger = logging.getLogger(__name__)
 
+# Shared by every search so paginating callers stay under the API quota
+_search_rate_limiter = AsyncRateLimiter(config.common.TWITTER_SEARCH_RATE_LIMIT, 60)
+
+
+_MONTHS = {
+    "Jan": 1,
+    "Feb": 2,
+    "Mar": 3,
+    "Apr": 4,
+    "May": 5,
+    "Jun": 6,
+    "Jul": 7,
+    "Aug": 8,
+    "Sep": 9,
+    "Oct": 10,
+    "Nov": 11,
+    "Dec": 12,
+}
+
+# Timezones by UTC offset string; Twitter always sends "+0000"
+_TIMEZONES = {"+0000": datetime.timezone.utc}
+
+
+def parse_twitter_date(created_at: Optional[str]) -> Optional[datetime.datetime]:
+    """
+    Parse Twitter's createdAt string, e.g. "Thu May 15 23:21:00 +0000 2025".
+    Splits the fixed format directly, which is much faster than strptime, and
+    falls back to strptime for anything unexpected. Results are cached, since
+    the same tweets are often parsed more than once (sorting, then the model).
+
+    Args:
+        created_at: The createdAt value from the Twitter API
+
+    Returns:
+        Timezone-aware datetime, or None if it can't be parsed
+    """
+    if not created_at or not isinstance(created_at, str):
+        return None
+
+    return _parse_twitter_date_cached(created_at)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_twitter_date_cached(created_at: str) -> Optional[datetime.datetime]:
+    """Parse a createdAt string; see parse_twitter_date."""
+    try:
+        _, month, day, hms, offset, year = created_at.split()
+        hour, minute, second = hms.split(":")
+        tzinfo = _TIMEZONES.get(offset)
+        if tzinfo is None:
+            sign = -1 if offset[0] == "-" else 1
+            tzinfo = datetime.timezone(
+                sign
+                * datetime.timedelta(hours=int(offset[1:3]), minutes=int(offset[3:5]))
+            )
+            _TIMEZONES[offset] = tzinfo
+        return datetime.datetime(
+            int(year),
+            _MONTHS[month],
+            int(day),
+            int(hour),
+            int(minute),
+            int(second),
+            tzinfo=tzinfo,
+        )
+    except (ValueError, TypeError, AttributeError, KeyError, IndexError):
+        pass
+
+    try:
+        return datetime.datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y")
+    except (ValueError, TypeError):
+        return None
+
 
 # Pydantic models for data validation
 class Author(BaseModel):
@@ -24,10 +100,6 @@ class Author(BaseModel):
     url: Optional[str] = None
     twitterUrl: Optional[str] = None
 
-    # Allow additional fields
-    class Config:
-        extra = "allow"
-
 
 class Tweet(BaseModel):
     id: Optional[str] = None
@@ -46,10 +118,6 @@ class Tweet(BaseModel):
     inReplyToId: Optional[str] = None  # ID of the tweet this is replying to
     inReplyToUserId: Optional[str] = None  # ID of the user this is replying to
 
-    # Allow additional fields
-    class Config:
-        extra = "allow"
-
     @validator("parsed_date", pre=True, always=True)
     def parse_date(cls, v, values):
         """Parse the date from createdAt field."""
@@ -58,43 +126,55 @@ class Tweet(BaseModel):
             return v
 
         # Try to parse from createdAt
-        created_at = values.get("createdAt")
-        if not created_at:
-            return None
+        return parse_twitter_date(values.get("createdAt"))
 
-        try:
-            # Twitter date format: "Thu May 15 23:21:00 +0000 2025"
-            # Use strptime to parse it
-            date_obj = datetime.datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y")
-            return date_obj
-        except (ValueError, TypeError):
-            # If parsing fails, return None
-            return None
-
-
-class WebhookPayload(BaseModel):
-    event_type: str = Field(
-        ..., description="Type of event, e.g. 'tweet' or 'test_webhook_url'"
-    )
-    rule_id: Optional[str] = Field(
-        None, description="ID of the rule that triggered this event"
-    )
-    rule_tag: Optional[str] = Field(
-        None, description="Tag of the rule that triggered this event"
-    )
-    tweets: Optional[List[Tweet]] = Field(
-        None, description="List of tweets in the payload"
-    )
-    timestamp: Optional[int] = None
+    @classmethod
+    def from_trusted(cls, data: Dict[str, Any]) -> "Tweet":
+        """
+        Build a Tweet from trusted Twitter API data without running validation.
+
+        model_construct neither recurses into nested models nor runs validators,
+        so the author is wrapped and parsed_date is filled in here.
+        """
+        values = dict(data)
+
+        author = values.get("author")
+        if isinstance(author, dict):
+            values["author"] = Author.model_construct(**author)
 
-    # Allow additional fields that aren't explicitly modeled
-    class Config:
-        extra = "allow"
+        if values.get("parsed_date") is None:
+            values["parsed_date"] = parse_twitter_date(values.get("createdAt"))
+
+        return cls.model_construct(**values)
+
+
+# Recently formatted messages, keyed by (tweet ID, text) since a translated
+# copy of a tweet keeps the original's ID
+_FORMAT_CACHE: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_FORMAT_CACHE_SIZE = 1024
 
 
 # Format tweet for Telegram
-def format_tweet_for_telegram(tweet: Tweet) -> str:
-    """Format a tweet for display in Telegram."""
+def format_tweet_for_telegram(tweet: Tweet, override_text: Optional[str] = None) -> str:
+    """
+    Format a tweet for display in Telegram.
+
+    Args:
+        tweet: The tweet to format
+        override_text: Text to show instead of the tweet's own (e.g. its
+            translation), so no modified copy of the tweet is needed
+
+    Returns:
+        str: The formatted message
+    """
+    # Get tweet text
+    text = (override_text if override_text is not None else tweet.text) or ""
+
+    cache_key = (tweet.id, text) if tweet.id else None
+    if cache_key in _FORMAT_CACHE:
+        _FORMAT_CACHE.move_to_end(cache_key)
+        return _FORMAT_CACHE[cache_key]
+
     # Handle potential missing fields
     author = tweet.author or Author()
 
@@ -102,9 +182,6 @@ def format_tweet_for_telegram(tweet: Tweet) -> str:
     username = author.userName or "unknown"
     tweet_id = tweet.id or ""
 
-    # Get tweet text
-    text = tweet.text or ""
-
     # Get or construct URL (prefer twitterUrl if available)
     tweet_url = (
         tweet.twitterUrl
@@ -127,10 +204,17 @@ def format_tweet_for_telegram(tweet: Tweet) -> str:
 
     # Simple format with text, date, and link
     # Use Telegram's HTML formatting - limited but supported
-    return (
+    message = (
         f"{text}\n\n" f"<code>{date_str}</code> | <i><a href='{tweet_url}'>Link</a></i>"
     )
 
+    if cache_key:
+        _FORMAT_CACHE[cache_key] = message
+        if len(_FORMAT_CACHE) > _FORMAT_CACHE_SIZE:
+            _FORMAT_CACHE.popitem(last=False)
+
+    return message
+
 
 async def search_tweets(
     query: str, query_type: str = "Latest", cursor: str = ""
@@ -164,8 +248,8 @@ async def search_tweets(
     logger.info(f"Searching Twitter with query: {query}{cursor_info}")
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, params=params, headers=headers)
+        async with _search_rate_limiter:
+            response = await get_http_client().get(url, params=params, headers=headers)
 
         if response.status_code != 200:
             logger.error(f"Twitter API error: {response.status_code} - {response.text}")
@@ -177,7 +261,7 @@ async def search_tweets(
             )
 
         # Parse JSON and log pagination info
-        result = response.json()
+        result = orjson.loads(response.content)
 
         # Log pagination details
         has_next = result.get("has_next_page", False)